@@ -16,6 +16,7 @@ config.json example (NOTE: YOU CAN CREATE THIS BY HAND OR BY USING THE PROMPTS O
     "client_id": "your_spotify_client_id",
     "client_secret": "your_spotify_client_secret",
     "redirect_uri": "http://localhost:8080",
+    "rate_limit": 10,
     "locked_playlists": [
         "My Super Important Mix - Do Not Touch",
         "spotify:playlist:another_locked_playlist_id"
@@ -41,31 +42,118 @@ config.json example (NOTE: YOU CAN CREATE THIS BY HAND OR BY USING THE PROMPTS O
 }
 """
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 import json
 import sys
+import copy
 import datetime
+import functools
+import importlib
+import importlib.util
+import itertools
 import os
+import queue
+import random
 import re
-import qrcode
+import sqlite3
+import stat
+import threading
+import time
+import types
+import weakref
+import multiprocessing
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def _lazy_import(name):
+    """
+    Import a module whose code only runs on first attribute access. spotipy and
+    requests make up most of our startup time, and commands like --show-config
+    never touch them.
+
+    A missing package raises ModuleNotFoundError here, as a plain import would.
+    LazyLoader's first-access load isn't thread-safe on the Python versions we
+    support, so _load_lazy_modules must run before any worker thread can touch
+    the module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+spotipy = _lazy_import("spotipy")
+requests = _lazy_import("requests")
+
+def _load_lazy_modules():
+    """Finish loading spotipy and requests on the calling thread, before any pool starts"""
+    for module in (spotipy, requests):
+        getattr(module, '__name__') # Any attribute read runs LazyLoader's deferred load
+
+try:
+    import orjson # Optional C JSON codec; stdlib json is used when it isn't installed
+except ImportError:
+    orjson = None
+
+def _json_loads(raw):
+    """Parse JSON from str or bytes with orjson if available (its errors subclass json.JSONDecodeError)"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def _json_dumps(obj):
+    """Compact JSON text, via orjson if available"""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
 
 CONFIG_FILE = "config.json"
 CACHE_FILE = ".cache"
+AUDIO_FEATURES_CACHE_FILE = ".audio_features_cache.db"
+PLAYLIST_NAMES_CACHE_FILE = ".playlist_names_cache.json"
+
+# Answers accepted by the interactive y/n prompts
+_YES = frozenset({'y', 'yes'})
+_NO = frozenset({'n', 'no'})
+
+# Splits a comma-separated list of playlist names, swallowing surrounding whitespace
+_PLAYLIST_NAME_SPLIT_RE = re.compile(r'\s*,\s*')
+
+# Spotify URL/ID formats, compiled once: track URL, URI or short link; playlist URL or URI; bare playlist ID
+_TRACK_ID_RE = re.compile(r'(?:https://open\.spotify\.com/track/|spotify:track:|https://spotify\.link/)([a-zA-Z0-9]+)')
+_PLAYLIST_URL_RE = re.compile(r'(?:https://open\.spotify\.com/playlist/|spotify:playlist:)([a-zA-Z0-9]+)')
+_PLAYLIST_ID_RE = re.compile(r'[a-zA-Z0-9]{22}') # Plain ID (typically 22 chars)
+
+# Parsed config is memoized by _read_config on (path, mtime_ns), so it's reused until config.json changes on disk
+def load_config(mutable=False):
+    """
+    Load configuration from config.json
 
-def load_config():
-    """Load configuration from config.json"""
+    The parsed config is cached until the file changes. Read-only callers share that
+    cached dict, so they must not modify it; callers that modify and save the config
+    pass mutable=True to get their own deep copy.
+    """
     if not os.path.exists(CONFIG_FILE):
         print(f"❌ Config file '{CONFIG_FILE}' not found!")
         print("Create a config.json file with your Spotify app credentials.")
         print("See the comments at the top of this script for the format.")
         sys.exit(1)
-    
+
+    data = _read_config(CONFIG_FILE, os.stat(CONFIG_FILE).st_mtime_ns)
+    return copy.deepcopy(data) if mutable else data
+
+@functools.lru_cache(maxsize=1)
+def _read_config(config_file, mtime_ns):
+    """
+    Parse and normalize config.json (exits on unreadable files, like load_config).
+
+    Memoized on (path, mtime) so repeated loads of an unchanged file skip the parse.
+    """
     data = {}
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            data = json.load(f)
+        with open(config_file, 'rb') as f:
+            data = _json_loads(f.read())
     except json.JSONDecodeError as e:
         print(f"❌ Error decoding {CONFIG_FILE}: {e}", file=sys.stderr)
         print(f"   Please check the file for syntax errors. Backing up and creating a default config.", file=sys.stderr)
@@ -86,80 +174,386 @@ def load_config():
         data['locked_playlists'] = []
         # A save could be triggered here if desired to correct the file immediately.
 
-    return data
+    # Index the locked entries once so lock checks don't rescan the list
+    data['locked_playlists'] = LockedPlaylists(data['locked_playlists'])
+
+    # Resolve the genre table once per load rather than on every get_genre_config call
+    return Config(data)
+
+# Connection pool size for the shared HTTP session. Sized for the TUI's worst overlap: the selected
+# playlist's page fetch plus both neighbour prefetches (8 each) and the API_CONCURRENCY slots.
+# Requests beyond the pool still go out, but on throwaway connections with a fresh TLS handshake.
+HTTP_POOL_SIZE = 32
+HTTP_USER_AGENT = "Spotify_Set_Controller/1"
+DEFAULT_RATE_LIMIT = 10 # Requests per second; override with "rate_limit" in config.json
+
+class RateLimiter:
+    """
+    Leaky-bucket limiter shared by every thread: each acquire() takes the next
+    free slot, spaced 1/rate seconds apart, and sleeps until it arrives.
+    """
+    def __init__(self, rate=DEFAULT_RATE_LIMIT):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Set requests per second; 0 or None disables limiting"""
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# One limiter for the whole process, so concurrent paths share the same budget
+RATE_LIMITER = RateLimiter()
+
+@functools.lru_cache(maxsize=None)
+def _rate_limited_adapter_class():
+    """HTTPAdapter subclass that waits for a RATE_LIMITER slot before each request (built on first use)"""
+    from requests.adapters import HTTPAdapter
+
+    class RateLimitedAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            RATE_LIMITER.acquire()
+            return super().send(request, **kwargs)
+
+    return RateLimitedAdapter
+
+def _build_http_session():
+    """Build a pooled, rate-limited requests session with the same retry policy spotipy uses"""
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=5,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=5,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504), # 429 is left to with_backoff, which caps Retry-After
+    )
+    adapter = _rate_limited_adapter_class()(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers.update({'User-Agent': HTTP_USER_AGENT})
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+@functools.lru_cache(maxsize=1)
+def _link_session():
+    """Pooled keep-alive session for following short links, shared by the resolver threads"""
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session = requests.Session()
+    session.headers.update({'User-Agent': HTTP_USER_AGENT})
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+MAX_BACKOFF_RETRIES = 5
+MAX_RETRY_AFTER = 30 # Seconds; a longer rate-limit ban is reported rather than slept through
+
+def _retry_after_seconds(error):
+    """Seconds to wait from a 429's Retry-After header (defaults to 1)"""
+    try:
+        return max(int((error.headers or {}).get('Retry-After', 1)), 0)
+    except (TypeError, ValueError):
+        return 1
+
+def with_backoff(fn):
+    """
+    Retry a Spotify call on 429 (sleeping for Retry-After plus jitter) and on
+    5xx (exponential backoff). Gives up after MAX_BACKOFF_RETRIES, or at once if
+    Spotify asks for a wait longer than MAX_RETRY_AFTER.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_BACKOFF_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except spotipy.SpotifyException as e:
+                if attempt == MAX_BACKOFF_RETRIES:
+                    raise
+                if e.http_status == 429:
+                    retry_after = _retry_after_seconds(e)
+                    if retry_after > MAX_RETRY_AFTER:
+                        raise
+                    delay = retry_after + random.random()
+                elif e.http_status and e.http_status >= 500:
+                    delay = min(2 ** attempt, MAX_RETRY_AFTER) + random.random()
+                else:
+                    raise
+                time.sleep(delay)
+    return wrapper
+
+def _call(method, *args, **kwargs):
+    """Call a spotipy client method with rate-limit aware retries"""
+    return with_backoff(method)(*args, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def _token_cache_handler_class():
+    """
+    CacheFileHandler that keeps the token in memory after the first read (built on
+    first use). spotipy asks the handler for the token before every API call, so
+    the stock handler re-reads and re-parses .cache each time. Saves still go to
+    disk, and the auth manager still refreshes the token when expires_at is near.
+    """
+    from spotipy.cache_handler import CacheFileHandler
+
+    class MemoizedCacheFileHandler(CacheFileHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._token_info = None
+
+        def get_cached_token(self):
+            if self._token_info is None:
+                self._token_info = super().get_cached_token()
+            return self._token_info
+
+        def save_token_to_cache(self, token_info):
+            self._token_info = token_info
+            super().save_token_to_cache(token_info)
+
+    return MemoizedCacheFileHandler
 
 def setup_spotify_client(config):
     """Initialize Spotify client with OAuth"""
     scope = "playlist-modify-public playlist-modify-private playlist-read-private user-library-modify user-library-read"
-    
-    auth_manager = SpotifyOAuth(
+    _load_lazy_modules() # Every worker pool gets its client from here
+
+    auth_manager = spotipy.oauth2.SpotifyOAuth(
         client_id=config['client_id'],
         client_secret=config['client_secret'],
         redirect_uri=config['redirect_uri'],
         scope=scope,
-        cache_path=CACHE_FILE,
+        cache_handler=_token_cache_handler_class()(cache_path=CACHE_FILE),
         open_browser=False  # Don't auto-open browser
     )
     
-    return spotipy.Spotify(auth_manager=auth_manager)
+    RATE_LIMITER.set_rate(config.get('rate_limit', DEFAULT_RATE_LIMIT))
+
+    # Keep-alive connections are reused across calls and worker threads
+    return spotipy.Spotify(auth_manager=auth_manager, requests_session=_build_http_session())
 
 def extract_track_id(url):
     """Extract track ID from Spotify URL"""
-    # Handle different Spotify URL formats
-    patterns = [
-        r'https://open\.spotify\.com/track/([a-zA-Z0-9]+)',
-        r'spotify:track:([a-zA-Z0-9]+)',
-        r'https://spotify\.link/([a-zA-Z0-9]+)'  # Short links
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    
-    return None
+    # Handles open.spotify.com URLs, spotify:track: URIs and spotify.link short links
+    match = _TRACK_ID_RE.search(url)
+    return match.group(1) if match else None
 
-def get_user_playlists(sp):
-    """Get all user playlists"""
-    playlists = {}
-    results = sp.current_user_playlists(limit=50)
-    
-    while results:
-        for playlist in results['items']:
-            if playlist['owner']['id'] == sp.current_user()['id']:  # Only user's own playlists
+def _is_short_link(url):
+    """True for spotify.link short URLs, which must be followed to get a track ID"""
+    return "spotify.link/" in url
+
+def _follow_short_link(url):
+    """Return the URL a short link redirects to, or the input if it can't be resolved"""
+    try:
+        return _link_session().head(url, allow_redirects=True, timeout=10).url
+    except requests.RequestException:
+        return url
+
+def resolve_short_links(urls, max_workers=10):
+    """
+    Resolve any spotify.link short URLs in urls concurrently.
+
+    :return: List of URLs in the same order, short links replaced by their targets
+    """
+    short_urls = [url for url in urls if _is_short_link(url)]
+    if not short_urls:
+        return list(urls)
+
+    _load_lazy_modules() # Callable without a client, so requests may not be loaded yet
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(short_urls))) as executor:
+        resolved = dict(zip(short_urls, executor.map(_follow_short_link, short_urls)))
+    return [resolved.get(url, url) for url in urls]
+
+def _iter_pages(sp, fetch_page, page_size, max_workers=10):
+    """
+    Yield the items of every page of a paged endpoint, one list per page, in order.
+    fetch_page(offset) returns one page; the first page gives the total, then the
+    remaining offsets are requested concurrently and each page is yielded as soon
+    as it and the pages before it have arrived. Falls back to following 'next'
+    links if there's no total.
+    """
+    first_page = fetch_page(0)
+    if not first_page:
+        return
+    yield list(first_page.get('items', []))
+    total = first_page.get('total')
+    if total is None:
+        # No total to plan with, fall back to following 'next' links
+        results = first_page
+        while results.get('next'):
+            results = _call(sp.next, results)
+            if not results:
+                break
+            yield list(results.get('items', []))
+        return
+
+    offsets = range(page_size, total, page_size)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(offsets))) as executor:
+            for page in executor.map(fetch_page, offsets): # map keeps page order
+                if page:
+                    yield list(page.get('items', []))
+
+def _fetch_all_pages(sp, fetch_page, page_size, max_workers=10):
+    """Collect the items of every page of a paged endpoint (see _iter_pages)"""
+    items = []
+    for page_items in _iter_pages(sp, fetch_page, page_size, max_workers):
+        items.extend(page_items)
+    return items
+
+USER_PLAYLISTS_PAGE_SIZE = 50 # Spotify API limit for current_user_playlists
+
+# Current user ID per client, so /me is requested once per session rather than per call
+_USER_IDS = weakref.WeakKeyDictionary()
+
+def current_user_id(sp):
+    """Return the current user's Spotify ID, fetching it at most once per client"""
+    user_id = _USER_IDS.get(sp)
+    if user_id is None:
+        user_id = _USER_IDS[sp] = _call(sp.current_user)['id']
+    return user_id
+
+class UserPlaylists(dict):
+    """
+    The user's playlists as {name: id}, plus a lowercase-name index built on first
+    use so case-insensitive lookups are a single dict hit instead of a scan.
+    """
+    __slots__ = ('_by_lower',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._by_lower = None
+
+    def matching_ignoring_case(self, playlist_name):
+        """Return [(name, id), ...] for every playlist whose name equals playlist_name ignoring case"""
+        if self._by_lower is None:
+            by_lower = {}
+            for name, pid in self.items():
+                by_lower.setdefault(name.lower(), []).append((name, pid))
+            self._by_lower = by_lower
+        return self._by_lower.get(playlist_name.lower(), [])
+
+# Playlist {name: id} maps per client, reused for the rest of the run. Cleared when we create a playlist.
+_USER_PLAYLISTS = weakref.WeakKeyDictionary()
+_USER_PLAYLISTS_FETCH_LOCKS = weakref.WeakKeyDictionary() # One per client, held while it fetches
+_USER_PLAYLISTS_LOCK = threading.Lock() # Guards the two dicts above, never held across a request
+
+def _cached_user_playlists(sp):
+    """This client's cached playlist map, or None"""
+    with _USER_PLAYLISTS_LOCK:
+        return _USER_PLAYLISTS.get(sp)
+
+def _user_playlists_fetch_lock(sp):
+    """The lock that serializes this client's playlist fetches (created on first use)"""
+    with _USER_PLAYLISTS_LOCK:
+        lock = _USER_PLAYLISTS_FETCH_LOCKS.get(sp)
+        if lock is None:
+            lock = _USER_PLAYLISTS_FETCH_LOCKS[sp] = threading.Lock()
+        return lock
+
+def get_user_playlists(sp, refresh=False):
+    """
+    Get all user playlists as {name: id}. The result is cached per client for the
+    rest of the run, so callers must not modify it; pass refresh=True to re-fetch.
+    """
+    if not refresh:
+        cached = _cached_user_playlists(sp)
+        if cached is not None:
+            return cached
+
+    # Concurrent callers for this client wait for one fetch instead of each paginating;
+    # other clients, and cache hits, aren't held up by it
+    with _user_playlists_fetch_lock(sp):
+        if not refresh:
+            cached = _cached_user_playlists(sp)
+            if cached is not None:
+                return cached
+
+        playlists = UserPlaylists()
+        # /me (once, not per playlist) is requested alongside the first page rather than before it
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            user_id_future = executor.submit(current_user_id, sp)
+            pages = _fetch_all_pages(sp, lambda offset: _call(sp.current_user_playlists, limit=USER_PLAYLISTS_PAGE_SIZE, offset=offset),
+                                     USER_PLAYLISTS_PAGE_SIZE)
+            user_id = user_id_future.result()
+
+        for playlist in pages:
+            if playlist['owner']['id'] == user_id:  # Only user's own playlists
                 playlists[playlist['name']] = playlist['id']
-        
-        if results['next']:
-            results = sp.next(results)
-        else:
-            break
-    
-    return playlists
+
+        with _USER_PLAYLISTS_LOCK:
+            _USER_PLAYLISTS[sp] = playlists
+        _save_playlist_names(playlists)
+        return playlists
+
+_PLAYLIST_NAMES_LOCK = threading.Lock()
+
+def _read_playlist_names():
+    """{playlist_id: name} as of the last playlist listing, or {} if there is no usable cache file"""
+    try:
+        with open(PLAYLIST_NAMES_CACHE_FILE, 'rb') as f:
+            names = _json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return names if isinstance(names, dict) else {}
+
+def _save_playlist_names(playlists):
+    """
+    Replace the name cache with a fresh {name: id} listing, so renamed and deleted
+    playlists drop out. Best effort: the file is rewritten only when a name changed,
+    and a failed write just leaves the old cache.
+    """
+    names = {pid: name for name, pid in playlists.items()}
+    with _PLAYLIST_NAMES_LOCK:
+        if names == _read_playlist_names():
+            return
+        tmp_file = f"{PLAYLIST_NAMES_CACHE_FILE}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(_json_dumps(names))
+            os.replace(tmp_file, PLAYLIST_NAMES_CACHE_FILE)
+        except OSError:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+def _forget_user_playlists(sp):
+    """Drop the cached playlist list after this client creates a playlist"""
+    with _USER_PLAYLISTS_LOCK:
+        _USER_PLAYLISTS.pop(sp, None)
 
 def extract_playlist_id(url_or_id):
     """Extract playlist ID from Spotify URL or ID"""
-    patterns = [
-        r'https://open\.spotify\.com/playlist/([a-zA-Z0-9]+)',
-        r'spotify:playlist:([a-zA-Z0-9]+)',
-        r'([a-zA-Z0-9]{22})' # Plain ID (typically 22 chars)
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url_or_id)
-        if match:
-            # For plain ID, it might be captured by the URL patterns if it's a substring
-            # Ensure it's the correct group and potentially re-verify if it's a standalone ID
-            if pattern == r'([a-zA-Z0-9]{22})' and len(url_or_id) == 22: # Likely a plain ID
-                 return match.group(1)
-            elif pattern != r'([a-zA-Z0-9]{22})': # One of the URL patterns
-                 return match.group(1)
-
-    # If it's exactly 22 chars and wasn't caught by specific URL patterns, assume it's an ID
-    if len(url_or_id) == 22 and re.match(r'^[a-zA-Z0-9]+$', url_or_id):
+    # Bare IDs are the common input and need no regex at all
+    if len(url_or_id) == 22 and url_or_id.isascii() and url_or_id.isalnum():
         return url_or_id
-        
+
+    match = _PLAYLIST_URL_RE.search(url_or_id)
+    if match:
+        return match.group(1)
+
+    # A bare ID only counts if it is the whole input
+    if _PLAYLIST_ID_RE.fullmatch(url_or_id):
+        return url_or_id
+
     return None
 
+# Playlist item fields needed to copy a playlist
+COPY_PLAYLIST_ITEM_FIELDS = "items(track(uri)),next,total"
+COPY_PLAYLIST_QUEUE_SIZE = 10 # Add batches buffered ahead of the writer
+
 def copy_playlist(sp, source_playlist_id_or_url, new_playlist_name):
     """Copies a playlist to the current user's account."""
     print("🔄 Starting playlist copy process...")
@@ -170,142 +564,184 @@ def copy_playlist(sp, source_playlist_id_or_url, new_playlist_name):
         return
 
     print(f"🔎 Fetching tracks from source playlist ID: {playlist_id}...")
-    source_tracks = []
+    # Only the URIs are needed; pages after the first are fetched concurrently and
+    # copied as they arrive, so adding overlaps with fetching the rest of the source
+    pages = iter_playlist_item_pages(sp, playlist_id, fields=COPY_PLAYLIST_ITEM_FIELDS,
+                                     max_workers=5, additional_types=("track", "episode"))
     try:
-        results = sp.playlist_items(playlist_id)
-        source_tracks.extend([item['track']['uri'] for item in results['items'] if item['track'] and item['track']['uri']])
-        while results['next']:
-            results = sp.next(results)
-            source_tracks.extend([item['track']['uri'] for item in results['items'] if item['track'] and item['track']['uri']])
+        first_page = next(pages, [])
     except Exception as e:
         print(f"❌ Error fetching tracks from source playlist: {e}")
         return
 
-    if not source_tracks:
+    if not first_page:
         print("⚠️ Source playlist is empty or tracks could not be fetched.")
         # Optionally create an empty playlist anyway, or just return
         # For now, let's proceed to create an empty playlist if that's the case
 
-    user_id = sp.me()['id']
+    user_id = current_user_id(sp)
     print(f"✨ Creating new playlist '{new_playlist_name}' for user {user_id}...")
     try:
-        new_playlist = sp.user_playlist_create(user_id, new_playlist_name)
+        new_playlist = _call(sp.user_playlist_create, user_id, new_playlist_name)
+        _forget_user_playlists(sp)
         new_playlist_id = new_playlist['id']
         print(f"✅ New playlist '{new_playlist_name}' created with ID: {new_playlist_id}")
     except Exception as e:
         print(f"❌ Error creating new playlist: {e}")
         return
 
-    if not source_tracks:
+    if not first_page:
         print(f"✅ Playlist '{new_playlist_name}' created successfully (it's empty as the source was empty).")
         return
 
-    print(f"➕ Adding {len(source_tracks)} tracks to '{new_playlist_name}'...")
-    tracks_added_count = 0
-    # Spotify API limit: 100 tracks per add request
-    for i in range(0, len(source_tracks), 100):
-        batch = source_tracks[i:i + 100]
-        try:
-            sp.playlist_add_items(new_playlist_id, batch)
-            tracks_added_count += len(batch)
-            print(f"   Added batch of {len(batch)} tracks...")
-        except Exception as e:
-            print(f"❌ Error adding batch of tracks to new playlist: {e}")
-            # Decide if to continue with other batches or stop
-            # For now, let's report and continue if possible, but this might leave the playlist partially copied.
-    
-    print(f"\n🎉 Playlist '{new_playlist_name}' created and {tracks_added_count}/{len(source_tracks)} tracks copied successfully!")
-
-
-def add_to_playlists(sp, track_id, playlist_ids, save_to_liked=False):
-    """Add track to multiple playlists and optionally to Liked Songs"""
-    results = []
-    
-    # Add to Liked Songs first if requested
-    if save_to_liked:
-        try:
-            # add_to_liked_songs now returns True/False, internal print removed too
-            if add_to_liked_songs(sp, track_id):
-                results.append(("Liked Songs", True, None))
-            else:
-                # This case implies an exception occurred in add_to_liked_songs
-                results.append(("Liked Songs", False, "Failed (exception in add_to_liked_songs)"))
-        except Exception as e_liked: # Catching potential exception from add_to_liked_songs if not handled within
-            results.append(("Liked Songs", False, str(e_liked)))
+    print(f"➕ Adding tracks to '{new_playlist_name}' as they are fetched...")
+    # A single writer drains the queue in FIFO order: Spotify appends each add to
+    # the end of the playlist, so concurrent adds could land out of source order
+    batches = queue.Queue(maxsize=COPY_PLAYLIST_QUEUE_SIZE)
+    tracks_added = 0
+
+    def add_batches():
+        nonlocal tracks_added # Read only after writer.join()
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            try:
+                _call(sp.playlist_add_items, new_playlist_id, batch)
+                tracks_added += len(batch)
+                print(f"   Added batch of {len(batch)} tracks...")
+            except Exception as e:
+                print(f"❌ Error adding batch of tracks to new playlist: {e}")
+                # Report and continue with the other batches, though this might leave the playlist partially copied.
 
-    # Add to playlists
-    for playlist_name, playlist_id in playlist_ids:
+    writer = threading.Thread(target=add_batches, daemon=True)
+    writer.start()
+    total_tracks = 0
+    pending = []
+    try:
+        page_items = first_page
+        while page_items is not None:
+            pending.extend(item['track']['uri'] for item in page_items if item.get('track') and item['track'].get('uri'))
+            while len(pending) >= PLAYLIST_ADD_BATCH_SIZE:
+                batches.put(pending[:PLAYLIST_ADD_BATCH_SIZE])
+                total_tracks += PLAYLIST_ADD_BATCH_SIZE
+                del pending[:PLAYLIST_ADD_BATCH_SIZE]
+            page_items = next(pages, None)
+    except Exception as e:
+        print(f"❌ Error fetching tracks from source playlist: {e}")
+    finally:
+        if pending:
+            batches.put(pending)
+            total_tracks += len(pending)
+        batches.put(None)
+        writer.join()
+
+    print(f"\n🎉 Playlist '{new_playlist_name}' created and {tracks_added}/{total_tracks} tracks copied successfully!")
+
+
+PLAYLIST_ADD_BATCH_SIZE = 100 # Spotify API limit for playlist_add_items
+SAVED_TRACKS_BATCH_SIZE = 50 # Spotify API limit for current_user_saved_tracks_add
+AUDIO_FEATURES_BATCH_SIZE = 100 # Spotify API limit for audio_features
+TRACKS_BATCH_SIZE = 50 # Spotify API limit for tracks
+ARTISTS_BATCH_SIZE = 50 # Spotify API limit for artists
+PLAYLIST_WRITE_CONCURRENCY = 2 # Writes in flight at once; Spotify throttles bursts of writes quickly
+AUDIO_FEATURES_CONCURRENCY = 4 # audio_features batches in flight at once; kept modest to stay clear of 429s
+
+def _chunks(items, size):
+    """Yield successive slices of at most size items"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _run_concurrently(jobs, max_workers):
+    """Run zero-argument callables on a thread pool and return their results in submission order"""
+    if len(jobs) <= 1:
+        return [job() for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = [executor.submit(job) for job in jobs]
+        return [future.result() for future in futures]
+
+def _playlist_write_job(sp, playlist_name, playlist_id, uris):
+    """Build a job that adds uris to one playlist and returns its (name, success, error) result"""
+    def job():
         try:
-            sp.playlist_add_items(playlist_id, [f"spotify:track:{track_id}"])
-            results.append((playlist_name, True, None))
+            for batch in _chunks(uris, PLAYLIST_ADD_BATCH_SIZE):
+                _call(sp.playlist_add_items, playlist_id, batch)
+            return (playlist_name, True, None)
         except Exception as e:
-            results.append((playlist_name, False, str(e)))
-    
-    return results
+            return (playlist_name, False, str(e))
+    return job
 
-# is_playlist_locked should be defined before add_to_playlists or imported if it were in a different file.
-# Assuming is_playlist_locked is already defined above this function in spotify_tool.py.
+def add_to_playlists(sp, track_ids, playlist_ids, save_to_liked=False, config=None, force=False):
+    """
+    Add tracks to multiple playlists and optionally to Liked Songs. All the
+    tracks go in one request body per playlist (per 100 tracks), so adding
+    several songs costs the same number of requests as adding one.
 
-def add_to_playlists(sp, track_id, playlist_ids, save_to_liked=False, config=None, force=False): # Added config and force
-    """Add track to multiple playlists and optionally to Liked Songs"""
-    results = []
-    
-    # Add to Liked Songs first if requested
-    if save_to_liked:
-        try:
-            if add_to_liked_songs(sp, track_id): # add_to_liked_songs is assumed to be refactored
-                results.append(("Liked Songs", True, None))
-            else:
-                results.append(("Liked Songs", False, "Failed (exception in add_to_liked_songs)"))
-        except Exception as e_liked: 
-            results.append(("Liked Songs", False, str(e_liked)))
-    
-    # Add to playlists
-    for playlist_name, playlist_id in playlist_ids:
-        if config and not force and is_playlist_locked(config, playlist_id): # Check lock status
-            results.append((playlist_name, False, "Playlist is locked"))
-            continue # Skip to the next playlist
+    :param track_ids: List of Spotify track IDs; a single ID string is also accepted
+    :return: List of (playlist_name, success, error_message) tuples, one per target
+    """
+    if isinstance(track_ids, str):
+        track_ids = [track_ids]
 
+    def save_liked():
         try:
-            sp.playlist_add_items(playlist_id, [f"spotify:track:{track_id}"])
-            results.append((playlist_name, True, None))
-        except Exception as e:
-            results.append((playlist_name, False, str(e)))
-    
+            for batch in _chunks(track_ids, SAVED_TRACKS_BATCH_SIZE):
+                _call(sp.current_user_saved_tracks_add, batch)
+            return ("Liked Songs", True, None)
+        except Exception as e_liked:
+            return ("Liked Songs", False, str(e_liked))
+
+    # Liked Songs first if requested, then each playlist. Locked playlists are
+    # answered up front so only real writes take one of the concurrent slots.
+    uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+    results = [None] if save_to_liked else []
+    writes = [(0, save_liked)] if save_to_liked else [] # (index into results, job)
+    locked_ids = locked_playlist_ids(config) if config and not force else frozenset() # One snapshot for every target
+    for name, pid in playlist_ids:
+        if pid in locked_ids: # Check lock status
+            results.append((name, False, "Playlist is locked"))
+        else:
+            writes.append((len(results), _playlist_write_job(sp, name, pid, uris)))
+            results.append(None)
+
+    for (index, _), result in zip(writes, _run_concurrently([job for _, job in writes], PLAYLIST_WRITE_CONCURRENCY)):
+        results[index] = result
     return results
 
 def add_to_liked_songs(sp, track_id):
     """Add track to Liked Songs (saved tracks). Returns True if successful, False otherwise."""
     try:
-        sp.current_user_saved_tracks_add([track_id])
+        _call(sp.current_user_saved_tracks_add, [track_id])
         return True
     except Exception: # Simplified: any exception means failure for this context
-        # The original had a print here. We remove it.
-        # The calling function (add_to_playlists) will now create the error message.
+        # The original had a print here. We remove it; callers report the failure.
         return False
 
+def _genre_table(config):
+    """
+    The config's genres as a read-only {genre: settings} mapping. The old
+    top-level "playlists" format becomes a single 'default' genre.
+    """
+    if 'playlists' in config and 'genres' not in config:
+        return types.MappingProxyType({'default': {'playlists': config['playlists'], 'save_to_liked': False}})
+    genres = config.get('genres')
+    return types.MappingProxyType(genres if isinstance(genres, dict) else {})
+
+def get_genre_names(config):
+    """Names of the configured genres, in config order"""
+    return list(config.genres if isinstance(config, Config) else _genre_table(config))
+
 def get_genre_config(config, genre=None):
-    """Get configuration for specific genre or default"""
-    # Support old config format
+    """
+    Get configuration for specific genre or default.
+
+    Raises KeyError naming the genre if it isn't configured; callers report it.
+    """
+    genres = config.genres if isinstance(config, Config) else _genre_table(config)
+    # Support old config format, whose playlists apply whatever genre is asked for
     if 'playlists' in config and 'genres' not in config:
-        return {
-            'playlists': config['playlists'],
-            'save_to_liked': False
-        }
-    
-    # New genre-based format
-    if 'genres' not in config:
-        print("❌ No 'genres' section found in config")
-        sys.exit(1)
-    
-    target_genre = genre or 'default'
-    
-    if target_genre not in config['genres']:
-        print(f"❌ Genre '{target_genre}' not found in config")
-        print(f"Available genres: {', '.join(config['genres'].keys())}")
-        sys.exit(1)
-    
-    return config['genres'][target_genre]
+        return genres['default']
+    return genres[genre or 'default']
 
 def get_track_details(sp, track_ids):
     """
@@ -319,56 +755,69 @@ def get_track_details(sp, track_ids):
     if not track_ids:
         return track_details_list
 
-    for track_id in track_ids:
+    print(f"Fetching details for {len(track_ids)} track(s)...")
+
+    # Batch endpoints return results in request order, with None for unknown IDs.
+    # A track listed twice (common in DJ sets) is requested once.
+    unique_track_ids = list(dict.fromkeys(track_ids))
+    features_by_id = {}
+    for batch in _chunks(unique_track_ids, AUDIO_FEATURES_BATCH_SIZE):
         try:
-            print(f"Fetching details for track ID: {track_id}...")
+            features_by_id.update(zip(batch, _call(sp.audio_features, tracks=batch) or []))
+        except Exception as e:
+            print(f"❌ Error fetching audio features for tracks {batch[0]}..{batch[-1]}: {e}")
 
-            # Fetch audio features
-            audio_features_response = sp.audio_features(tracks=[track_id])
-            # audio_features_response is a list, get the first element
-            current_audio_features = audio_features_response[0] if audio_features_response and audio_features_response[0] else None
+    tracks_by_id = {}
+    for batch in _chunks(unique_track_ids, TRACKS_BATCH_SIZE):
+        try:
+            tracks_by_id.update(zip(batch, (_call(sp.tracks, batch) or {}).get('tracks', [])))
+        except Exception as e:
+            print(f"❌ Error fetching track data for tracks {batch[0]}..{batch[-1]}: {e}")
+
+    # Each artist is looked up once, however many tracks share it
+    artist_ids = list(dict.fromkeys(
+        artist['id']
+        for track_data in tracks_by_id.values() if track_data
+        for artist in track_data.get('artists', []) if artist.get('id')
+    ))
+    genres_by_artist = {}
+    for batch in _chunks(artist_ids, ARTISTS_BATCH_SIZE):
+        try:
+            for artist_id, artist_details in zip(batch, (_call(sp.artists, batch) or {}).get('artists', [])):
+                if artist_details and 'genres' in artist_details:
+                    genres_by_artist[artist_id] = artist_details['genres']
+        except Exception as e_artist:
+            print(f"❌ Error fetching genres for artists {batch[0]}..{batch[-1]}: {e_artist}")
 
-            if not current_audio_features:
-                print(f"⚠️ Warning: Could not fetch audio features for track ID: {track_id}. Skipping audio features for this track.")
-                # We can decide to skip the track entirely or proceed without audio features.
-                # For now, let's store None for audio_features and proceed.
-            
-            # Fetch full track details for artist information
-            track_data = sp.track(track_id)
-            if not track_data:
-                print(f"❌ Error: Could not fetch track data for ID: {track_id}. Skipping this track.")
-                continue
+    for track_id in track_ids:
+        current_audio_features = features_by_id.get(track_id)
+        if not current_audio_features:
+            print(f"⚠️ Warning: Could not fetch audio features for track ID: {track_id}. Skipping audio features for this track.")
+            # Store None for audio_features and proceed.
+
+        track_data = tracks_by_id.get(track_id)
+        if not track_data:
+            print(f"❌ Error: Could not fetch track data for ID: {track_id}. Skipping this track.")
+            continue
 
-            all_artist_genres = set()
-            if 'artists' in track_data:
-                for artist_summary in track_data['artists']:
-                    artist_id = artist_summary.get('id')
-                    if artist_id:
-                        try:
-                            artist_details = sp.artist(artist_id)
-                            if artist_details and 'genres' in artist_details:
-                                all_artist_genres.update(artist_details['genres'])
-                        except Exception as e_artist:
-                            print(f"❌ Error fetching genres for artist ID {artist_id} (track {track_id}): {e_artist}")
-                    else:
-                        print(f"⚠️ Warning: Artist ID missing for an artist in track {track_id}.")
-            else:
-                print(f"⚠️ Warning: No artists found in track data for {track_id}.")
+        all_artist_genres = set()
+        if 'artists' in track_data:
+            for artist_summary in track_data['artists']:
+                artist_id = artist_summary.get('id')
+                if artist_id:
+                    all_artist_genres.update(genres_by_artist.get(artist_id, []))
+                else:
+                    print(f"⚠️ Warning: Artist ID missing for an artist in track {track_id}.")
+        else:
+            print(f"⚠️ Warning: No artists found in track data for {track_id}.")
 
-            track_info = {
-                'id': track_id,
-                'audio_features': current_audio_features,
-                'artist_genres': sorted(list(all_artist_genres)) # Store as sorted list
-            }
-            track_details_list.append(track_info)
-            print(f"✅ Successfully fetched details for track ID: {track_id}")
+        track_details_list.append({
+            'id': track_id,
+            'audio_features': current_audio_features,
+            'artist_genres': sorted(list(all_artist_genres)) # Store as sorted list
+        })
 
-        except Exception as e:
-            print(f"❌ An error occurred while processing track ID {track_id}: {e}")
-            # Optionally, decide if you want to add partial data or skip
-            # For now, we skip the track if a major error occurs in the main try block
-            continue
-            
+    print(f"✅ Successfully fetched details for {len(track_details_list)} track(s).")
     return track_details_list
 
 def get_user_top_artists_and_genres(sp, time_range='medium_term', limit=20):
@@ -394,7 +843,7 @@ def get_user_top_artists_and_genres(sp, time_range='medium_term', limit=20):
     seed_genres = set()
 
     try:
-        results = sp.current_user_top_artists(time_range=time_range, limit=limit)
+        results = _call(sp.current_user_top_artists, time_range=time_range, limit=limit)
         if results and results.get('items'):
             for artist in results['items']:
                 if artist.get('id'):
@@ -444,7 +893,7 @@ def get_genre_suggestions_from_recommendations(sp, current_artist_ids, current_g
     # Fetch Recommendations
     try:
         # Use None if lists are empty, as Spotipy expects
-        recommendations = sp.recommendations(
+        recommendations = _call(sp.recommendations,
             seed_artists=final_seed_artist_ids if final_seed_artist_ids else None,
             seed_genres=final_seed_genres if final_seed_genres else None,
             limit=rec_limit
@@ -479,7 +928,7 @@ def get_genre_suggestions_from_recommendations(sp, current_artist_ids, current_g
     for i in range(0, len(all_recommended_artist_ids_list), 50):
         batch_artist_ids = all_recommended_artist_ids_list[i:i + 50]
         try:
-            artists_details_batch = sp.artists(batch_artist_ids)
+            artists_details_batch = _call(sp.artists, batch_artist_ids)
             if not artists_details_batch or not artists_details_batch.get('artists'):
                 continue
 
@@ -533,7 +982,7 @@ def get_user_top_tracks_by_time_range(sp, time_range, limit=50):
 
     top_tracks_data = []
     try:
-        results = sp.current_user_top_tracks(time_range=time_range, limit=limit)
+        results = _call(sp.current_user_top_tracks, time_range=time_range, limit=limit)
         if results and results.get('items'):
             for track in results['items']:
                 if not track or not track.get('id'): # Skip if track data is missing or incomplete
@@ -581,7 +1030,7 @@ def get_user_recently_played_tracks(sp, limit=50):
 
     recent_tracks_data = []
     try:
-        results = sp.current_user_recently_played(limit=limit)
+        results = _call(sp.current_user_recently_played, limit=limit)
         if results and results.get('items'):
             for item in results['items']:
                 track = item.get('track')
@@ -627,30 +1076,17 @@ def find_old_favorites(sp, long_term_tracks, medium_term_tracks, short_term_trac
     :param num_suggestions: The maximum number of old favorites to return.
     :return: A list of track dictionaries that are considered "old favorites".
     """
-    # Extract IDs for efficient filtering
-    medium_term_ids = {track['id'] for track in medium_term_tracks if track and 'id' in track}
-    short_term_ids = {track['id'] for track in short_term_tracks if track and 'id' in track}
-    recent_ids = {track['id'] for track in recent_tracks if track and 'id' in track}
-
-    old_favorites_candidates = []
-
-    for track in long_term_tracks:
-        if not track or 'id' not in track: # Ensure track and its ID are valid
-            continue
-            
-        track_id = track['id']
-        if (track_id not in medium_term_ids and
-            track_id not in short_term_ids and
-            track_id not in recent_ids):
-            old_favorites_candidates.append(track) # Add the whole track dictionary
-
-    # Limit the number of suggestions
-    if len(old_favorites_candidates) > num_suggestions:
-        # For now, simple slicing. Random sampling could be an alternative.
-        # e.g., import random; return random.sample(old_favorites_candidates, num_suggestions)
-        return old_favorites_candidates[:num_suggestions]
-    
-    return old_favorites_candidates
+    # One set of every ID heard lately, so each long-term track costs a single lookup
+    heard_recently_ids = {track['id'] for tracks in (medium_term_tracks, short_term_tracks, recent_tracks)
+                          for track in tracks if track and 'id' in track}
+
+    # Stop scanning as soon as enough suggestions are found
+    # (Random sampling could be an alternative to taking the first ones.)
+    old_favorites_candidates = (
+        track for track in long_term_tracks
+        if track and 'id' in track and track['id'] not in heard_recently_ids # Ensure track and its ID are valid
+    )
+    return list(itertools.islice(old_favorites_candidates, max(num_suggestions, 0)))
 
 # --- Music Key Conversion Utilities ---
 
@@ -730,12 +1166,137 @@ def standard_to_camelot(standard_key_notation: str) -> str:
         
     return STANDARD_TO_CAMELOT_MAP.get(standard_key_notation, "-")
 
-def get_audio_features_for_playlist(sp, playlist_id_or_url):
+# (key, mode) -> (standard key, Camelot code) for all 24 valid pairs, so per-track
+# analysis is one dict lookup instead of two conversions
+KEY_MODE_LABELS = {
+    (key_int, mode_int): (spotify_key_to_standard(key_int, mode_int),
+                          standard_to_camelot(spotify_key_to_standard(key_int, mode_int)))
+    for key_int in PITCH_CLASS_MAP_SHARPS for mode_int in MODE_MAP
+}
+_UNKNOWN_KEY_LABELS = ("Unknown Key", "-")
+
+# --- Audio features disk cache ---
+# Audio features never change for a track ID, so they are kept across runs.
+
+def _open_audio_features_cache():
+    """Open (creating if needed) the audio features cache. Returns None if unavailable."""
+    try:
+        conn = sqlite3.connect(AUDIO_FEATURES_CACHE_FILE)
+        conn.execute("CREATE TABLE IF NOT EXISTS features (id TEXT PRIMARY KEY, json TEXT NOT NULL, fetched_at INTEGER NOT NULL)")
+        return conn
+    except sqlite3.Error as e:
+        print(f"Warning: Audio features cache unavailable: {e}", file=sys.stderr)
+        return None
+
+def _load_cached_audio_features(conn, track_ids):
+    """Return {track_id: features} for the IDs present in the cache"""
+    cached = {}
+    unique_ids = list(dict.fromkeys(track_ids))
+    for i in range(0, len(unique_ids), 500): # Stay under SQLite's bound-parameter limit
+        batch = unique_ids[i:i + 500]
+        placeholders = ",".join("?" * len(batch))
+        for track_id, blob in conn.execute(f"SELECT id, json FROM features WHERE id IN ({placeholders})", batch):
+            cached[track_id] = _json_loads(blob)
+    return cached
+
+def _store_cached_audio_features(conn, features_by_id):
+    now = int(time.time())
+    with conn: # Commits on success
+        conn.executemany("INSERT OR REPLACE INTO features (id, json, fetched_at) VALUES (?, ?, ?)",
+                         [(track_id, _json_dumps(features), now) for track_id, features in features_by_id.items()])
+
+# Playlist item fields needed to label audio-feature rows
+AUDIO_FEATURES_ITEM_FIELDS = "items(track(id,name,artists(name))),next,total"
+PLAYLIST_PAGE_SIZE = 100 # Spotify API limit for playlist_items
+
+def fetch_all_playlist_items(sp, playlist_id, fields=None, max_workers=10, additional_types=("track",)):
+    """
+    Fetches every item of a playlist. The first page is fetched to learn the
+    total, then the remaining pages are requested concurrently.
+
+    :param sp: spotipy.Spotify client instance
+    :param playlist_id: Spotify playlist ID
+    :param fields: Optional fields filter; must include 'total' for parallel fetching
+    :param max_workers: Maximum number of pages in flight at once
+    :param additional_types: Item types to return besides tracks, e.g. ("track", "episode")
+    :return: List of playlist items in playlist order
+    """
+    def fetch_page(offset):
+        return _call(sp.playlist_items, playlist_id, fields=fields, limit=PLAYLIST_PAGE_SIZE,
+                     offset=offset, additional_types=additional_types)
+
+    return _fetch_all_pages(sp, fetch_page, PLAYLIST_PAGE_SIZE, max_workers)
+
+def iter_playlist_item_pages(sp, playlist_id, fields=None, max_workers=10, additional_types=("track",)):
+    """
+    Like fetch_all_playlist_items, but yields the items one page at a time, in
+    playlist order, as the pages arrive so callers can start work early.
+    """
+    def fetch_page(offset):
+        return _call(sp.playlist_items, playlist_id, fields=fields, limit=PLAYLIST_PAGE_SIZE,
+                     offset=offset, additional_types=additional_types)
+
+    return _iter_pages(sp, fetch_page, PLAYLIST_PAGE_SIZE, max_workers)
+
+def get_audio_features_for_tracks(sp, track_ids, use_cache=True, refresh_cache=False):
+    """
+    Fetches audio features for track IDs, requesting only those not already in
+    the on-disk cache.
+
+    :param sp: spotipy.Spotify client instance
+    :param track_ids: A list of Spotify track IDs
+    :param use_cache: Read and write audio features in the on-disk cache
+    :param refresh_cache: Ignore cached features and re-fetch them (the cache is still updated)
+    :return: Dict of track ID -> audio features; IDs without features are left out
+    """
+    features_by_id = {}
+    cache_conn = _open_audio_features_cache() if use_cache else None
+    if cache_conn and not refresh_cache:
+        try:
+            features_by_id = _load_cached_audio_features(cache_conn, track_ids)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Warning: Could not read audio features cache: {e}", file=sys.stderr)
+
+    missing_track_ids = list(dict.fromkeys(tid for tid in track_ids if tid not in features_by_id))
+    fetched_features = {}
+
+    def fetch_batch(batch_ids):
+        try:
+            return _call(sp.audio_features, tracks=batch_ids) or []
+        except spotipy.SpotifyException as e:
+            print(f"Spotify API error fetching audio features for tracks {batch_ids[0]}..{batch_ids[-1]}: {e}", file=sys.stderr)
+        except Exception as e:
+            print(f"Unexpected error fetching audio features for tracks {batch_ids[0]}..{batch_ids[-1]}: {e}", file=sys.stderr)
+        return [] # Continue with the other batches if one fails
+
+    # Up to AUDIO_FEATURES_BATCH_SIZE (100) IDs per request, the endpoint's limit, with a few requests in flight at once
+    batches = list(_chunks(missing_track_ids, AUDIO_FEATURES_BATCH_SIZE))
+    for batch_features in _run_concurrently([functools.partial(fetch_batch, batch) for batch in batches], AUDIO_FEATURES_CONCURRENCY):
+        # Some items can be None if features are unavailable for that track
+        for features in batch_features:
+            if features and features.get('id'):
+                fetched_features[features['id']] = features
+
+    features_by_id.update(fetched_features)
+    if cache_conn:
+        try:
+            if fetched_features:
+                _store_cached_audio_features(cache_conn, fetched_features)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not update audio features cache: {e}", file=sys.stderr)
+        finally:
+            cache_conn.close()
+
+    return features_by_id
+
+def get_audio_features_for_playlist(sp, playlist_id_or_url, use_cache=True, refresh_cache=False):
     """
     Fetches all tracks from a playlist and their audio features (tempo, key, mode).
 
     :param sp: spotipy.Spotify client instance
     :param playlist_id_or_url: Spotify playlist ID or URL
+    :param use_cache: Read and write audio features in the on-disk cache
+    :param refresh_cache: Ignore cached features and re-fetch them (the cache is still updated)
     :return: A list of dictionaries, each containing track 'id', 'name', 'artist', 
              'tempo', 'key', and 'mode'. Returns an empty list on error.
     """
@@ -747,24 +1308,18 @@ def get_audio_features_for_playlist(sp, playlist_id_or_url):
     playlist_tracks_info = []
     try:
         print(f"Fetching tracks for playlist ID: {playlist_id}...", file=sys.stderr) # Progress for CLI
-        results = sp.playlist_items(playlist_id)
-        while results:
-            for item in results.get('items', []):
-                track = item.get('track')
-                if track and track.get('id'):
-                    track_id = track['id']
-                    track_name = track.get('name', 'Unknown Track')
-                    artist_name = "Unknown Artist"
-                    if track.get('artists') and len(track['artists']) > 0:
-                        first_artist = track['artists'][0]
-                        if first_artist and first_artist.get('name'):
-                            artist_name = first_artist['name']
-                    playlist_tracks_info.append({'id': track_id, 'name': track_name, 'artist': artist_name})
-            
-            if results['next']:
-                results = sp.next(results) # Potentially blocking, but this function is for CLI/backend
-            else:
-                results = None
+        # Only ask for the fields used below; full track objects are ~10x larger
+        for item in fetch_all_playlist_items(sp, playlist_id, fields=AUDIO_FEATURES_ITEM_FIELDS):
+            track = item.get('track')
+            if track and track.get('id'):
+                track_id = track['id']
+                track_name = track.get('name', 'Unknown Track')
+                artist_name = "Unknown Artist"
+                if track.get('artists') and len(track['artists']) > 0:
+                    first_artist = track['artists'][0]
+                    if first_artist and first_artist.get('name'):
+                        artist_name = first_artist['name']
+                playlist_tracks_info.append({'id': track_id, 'name': track_name, 'artist': artist_name})
     except spotipy.SpotifyException as e:
         print(f"Spotify API error fetching playlist items for {playlist_id}: {e}", file=sys.stderr)
         return []
@@ -778,46 +1333,25 @@ def get_audio_features_for_playlist(sp, playlist_id_or_url):
     
     print(f"Found {len(playlist_tracks_info)} tracks. Fetching audio features...", file=sys.stderr)
 
-    all_track_ids = [track['id'] for track in playlist_tracks_info]
+    features_by_id = get_audio_features_for_tracks(sp, [track['id'] for track in playlist_tracks_info],
+                                                   use_cache=use_cache, refresh_cache=refresh_cache)
+
+    # Merge the features back into the track metadata by ID, keeping playlist order
     tracks_with_features = []
     missing_features_count = 0
-
-    for i in range(0, len(all_track_ids), 100): # Spotify API limit for audio_features is 100
-        batch_ids = all_track_ids[i:i + 100]
-        try:
-            audio_features_results = sp.audio_features(tracks=batch_ids)
-            
-            # The audio_features_results list is in the same order as batch_ids.
-            # Some items in audio_features_results can be None if features are unavailable.
-            for idx, features in enumerate(audio_features_results):
-                # Find the original track info. Since we processed in batches,
-                # the current batch_ids[idx] corresponds to features.
-                # The original track info can be found by matching this ID or by index if we kept track of batches.
-                # For simplicity, let's find the track info from playlist_tracks_info using the ID.
-                # This assumes track IDs are unique within the playlist_tracks_info list.
-                
-                # The index in the original playlist_tracks_info for the current feature set
-                original_track_info_index = i + idx 
-                track_info = playlist_tracks_info[original_track_info_index]
-
-                if features:
-                    tracks_with_features.append({
-                        'id': track_info['id'],
-                        'name': track_info['name'],
-                        'artist': track_info['artist'],
-                        'tempo': features.get('tempo'),
-                        'key': features.get('key'),    # Integer: 0=C, 1=C♯/D♭, ..., 11=B
-                        'mode': features.get('mode')   # Integer: 0=Minor, 1=Major
-                    })
-                else:
-                    missing_features_count += 1
-                    # print(f"Warning: Audio features not available for track ID: {track_info['id']}", file=sys.stderr)
-
-        except spotipy.SpotifyException as e:
-            print(f"Spotify API error fetching audio features for batch starting at index {i}: {e}", file=sys.stderr)
-            # Continue to next batch if one fails, or decide to return []
-        except Exception as e:
-            print(f"Unexpected error fetching audio features for batch starting at index {i}: {e}", file=sys.stderr)
+    for track_info in playlist_tracks_info:
+        features = features_by_id.get(track_info['id'])
+        if features:
+            tracks_with_features.append({
+                'id': track_info['id'],
+                'name': track_info['name'],
+                'artist': track_info['artist'],
+                'tempo': features.get('tempo'),
+                'key': features.get('key'),    # Integer: 0=C, 1=C♯/D♭, ..., 11=B
+                'mode': features.get('mode')   # Integer: 0=Minor, 1=Major
+            })
+        else:
+            missing_features_count += 1
 
     if missing_features_count > 0:
         print(f"Warning: Audio features were not available for {missing_features_count} track(s).", file=sys.stderr)
@@ -842,11 +1376,8 @@ def analyze_playlist_audio_summary(tracks_with_features):
             'processed_tracks': []
         }
 
-    total_bpm = 0.0
-    min_bpm = float('inf')
-    max_bpm = float('-inf')
-    num_tracks_with_tempo = 0
-    key_counts = {}  # Using a simple dict for counts
+    tempos = [] # Reduced once with the C-level sum/min/max after the loop
+    key_mode_counts = Counter() # Counted as (key, mode) ints; named once at the end
     processed_tracks_list = []
 
     for track in tracks_with_features:
@@ -859,11 +1390,7 @@ def analyze_playlist_audio_summary(tracks_with_features):
         tempo = track.get('tempo')
         if tempo is not None:
             try:
-                tempo_float = float(tempo) # Ensure tempo is a number
-                total_bpm += tempo_float
-                min_bpm = min(min_bpm, tempo_float)
-                max_bpm = max(max_bpm, tempo_float)
-                num_tracks_with_tempo += 1
+                tempos.append(float(tempo)) # Ensure tempo is a number
             except (ValueError, TypeError):
                 # Tempo was not a valid number, skip for BPM stats
                 pass # Optionally log a warning
@@ -871,51 +1398,54 @@ def analyze_playlist_audio_summary(tracks_with_features):
         # Key Conversion and Counting
         key_int = track.get('key')
         mode_int = track.get('mode')
-        
-        standard_key = "Unknown Key"
-        camelot_key = "-"
+        # Spotify sends ints, so the raw pair almost always hits the table directly
+        key_mode = (key_int, mode_int)
+        labels = KEY_MODE_LABELS.get(key_mode)
 
-        if key_int is not None and mode_int is not None:
+        if labels is None and key_int is not None and mode_int is not None:
             try:
                 # Ensure key_int and mode_int are integers if they come from JSON that might have them as strings
-                key_int = int(key_int)
-                mode_int = int(mode_int)
-                standard_key = spotify_key_to_standard(key_int, mode_int)
-                camelot_key = standard_to_camelot(standard_key)
+                key_mode = (int(key_int), int(mode_int))
+                labels = KEY_MODE_LABELS.get(key_mode)
             except (ValueError, TypeError):
                 # Key/mode were not valid integers, keep default "Unknown Key" / "-"
                 pass # Optionally log a warning
 
+        standard_key, camelot_key = labels or _UNKNOWN_KEY_LABELS
+
         # Add to the current track dictionary (create a copy to avoid modifying original input list items directly if they are reused)
         processed_track = track.copy() 
         processed_track['standard_key'] = standard_key
         processed_track['camelot_key'] = camelot_key
         
-        # Increment count for standard_key
-        if standard_key != "Unknown Key": # Only count valid keys
-            key_counts[standard_key] = key_counts.get(standard_key, 0) + 1
+        # Only count valid keys
+        if labels:
+            key_mode_counts[key_mode] += 1
         
         processed_tracks_list.append(processed_track)
 
     # Calculate Final Stats
-    average_bpm = total_bpm / num_tracks_with_tempo if num_tracks_with_tempo > 0 else 0.0
-    
-    # If no tracks had tempo, min_bpm and max_bpm would still be inf/-inf. Reset them.
-    if num_tracks_with_tempo == 0:
-        min_bpm = 0.0
-        max_bpm = 0.0
-        
+    if tempos:
+        average_bpm = sum(tempos) / len(tempos)
+        min_bpm = min(tempos)
+        max_bpm = max(tempos)
+    else:
+        average_bpm = min_bpm = max_bpm = 0.0
+
     # Sort key_distribution by frequency (descending)
-    sorted_key_distribution = dict(sorted(key_counts.items(), key=lambda item: item[1], reverse=True))
+    sorted_key_distribution = {KEY_MODE_LABELS[key_mode][0]: count for key_mode, count in key_mode_counts.most_common()}
 
     return {
         'average_bpm': round(average_bpm, 2),
-        'min_bpm': round(min_bpm, 2) if min_bpm != float('inf') else 0.0, # Ensure no inf if list was empty but passed initial check
-        'max_bpm': round(max_bpm, 2) if max_bpm != float('-inf') else 0.0, # Ensure no -inf
+        'min_bpm': round(min_bpm, 2),
+        'max_bpm': round(max_bpm, 2),
         'key_distribution': sorted_key_distribution,
         'processed_tracks': processed_tracks_list 
     }
 
+# Column layout of the bpm-key-analysis Track Details table, parsed once
+TRACK_DETAILS_ROW_FORMAT = "{:<4} | {:<35.35} | {:<25.25} | {:<6} | {:<12} | {:<7}"
+
 def analyze_playlist_mood_genre(sp, playlist_id_or_url):
     """
     Analyzes a playlist to determine its dominant genres, average audio features,
@@ -937,10 +1467,10 @@ def analyze_playlist_mood_genre(sp, playlist_id_or_url):
     source_track_items = []
     try:
         print(f"🔎 Fetching tracks from source playlist ID: {playlist_id}...")
-        results = sp.playlist_items(playlist_id)
+        results = _call(sp.playlist_items, playlist_id)
         source_track_items.extend(results['items'])
         while results['next']:
-            results = sp.next(results)
+            results = _call(sp.next, results)
             source_track_items.extend(results['items'])
     except Exception as e:
         print(f"❌ Error fetching tracks from source playlist {playlist_id}: {e}")
@@ -1045,7 +1575,7 @@ def get_recommendations(sp, analysis_results, limit=20):
         for track_uri in final_seed_track_uris:
             track_id_for_artist_fetch = track_uri.split(':')[-1]
             try:
-                track_info = sp.track(track_id_for_artist_fetch)
+                track_info = _call(sp.track, track_id_for_artist_fetch)
                 if track_info and track_info['artists']:
                     # Using only the first artist as a seed
                     main_artist_id = track_info['artists'][0]['id']
@@ -1098,7 +1628,7 @@ def get_recommendations(sp, analysis_results, limit=20):
 
     try:
         print("📞 Calling Spotify recommendations API...")
-        recommendations = sp.recommendations(
+        recommendations = _call(sp.recommendations,
             seed_artists=final_seed_artist_ids if final_seed_artist_ids else None, 
             seed_genres=final_seed_genre_list if final_seed_genre_list else None,
             seed_tracks=final_seed_track_uris if final_seed_track_uris else None,
@@ -1139,7 +1669,7 @@ def determine_new_playlist_name(sp, source_playlist_id, new_name_provided=None):
 
     date_str = datetime.date.today().isoformat()
     try:
-        playlist_details = sp.playlist(source_playlist_id)
+        playlist_details = _call(sp.playlist, source_playlist_id)
         original_name = playlist_details.get('name')
         if original_name:
             determined_name = f"Curated - {original_name} - {date_str}"
@@ -1161,9 +1691,10 @@ def create_empty_playlist(sp, playlist_name):
     :return: The ID of the new playlist, or None if creation fails.
     """
     try:
-        user_id = sp.me()['id']
+        user_id = current_user_id(sp)
         print(f"✨ Creating new playlist '{playlist_name}' for user {user_id}...")
-        new_playlist = sp.user_playlist_create(user=user_id, name=playlist_name, public=True) # Defaulting to public
+        new_playlist = _call(sp.user_playlist_create, user=user_id, name=playlist_name, public=True) # Defaulting to public
+        _forget_user_playlists(sp)
         new_playlist_id = new_playlist['id']
         print(f"✅ New playlist '{playlist_name}' created successfully with ID: {new_playlist_id}")
         return new_playlist_id
@@ -1196,7 +1727,7 @@ def populate_playlist_with_tracks(sp, playlist_id, track_ids):
     for i in range(0, len(track_uris), batch_size):
         batch = track_uris[i:i + batch_size]
         try:
-            sp.playlist_add_items(playlist_id, batch)
+            _call(sp.playlist_add_items, playlist_id, batch)
             tracks_added_count += len(batch)
             print(f"   Added batch of {len(batch)} tracks...")
         except Exception as e:
@@ -1279,16 +1810,8 @@ def curate_playlist_command(sp, source_playlist_id_or_url, new_playlist_name_arg
 def setup_command():
     """Setup command - authenticate and show available playlists"""
     config = load_config()
-    
-    scope = "playlist-modify-public playlist-modify-private playlist-read-private user-library-modify user-library-read"
-    auth_manager = SpotifyOAuth(
-        client_id=config['client_id'],
-        client_secret=config['client_secret'],
-        redirect_uri=config['redirect_uri'],
-        scope=scope,
-        cache_path=CACHE_FILE,
-        open_browser=False
-    )
+    sp = setup_spotify_client(config)
+    auth_manager = sp.auth_manager
     
     # Check if we already have a token
     token_info = auth_manager.get_cached_token()
@@ -1304,10 +1827,9 @@ def setup_command():
         # Exchange code for token
         token_info = auth_manager.get_access_token(auth_code)
     
-    sp = spotipy.Spotify(auth_manager=auth_manager)
-    
     # This will trigger the OAuth flow
-    user = sp.current_user()
+    user = _call(sp.current_user)
+    _USER_IDS[sp] = user['id'] # Reused by get_user_playlists below
     print(f"✅ Successfully authenticated as: {user['display_name']}")
     
     print("\n📋 Your playlists:")
@@ -1325,25 +1847,23 @@ def setup_command():
     print(f"\n💡 Update your {CONFIG_FILE} file with the playlist names and genres you want to use.")
 
 def find_playlist_ids(sp, playlist_names):
-    """Find playlist IDs from names"""
+    """Find playlist IDs from names, keeping the order the names were given in"""
     user_playlists = get_user_playlists(sp)
-    playlist_ids = []
-    not_found = []
-    
-    for name in playlist_names:
-        if name in user_playlists:
-            playlist_ids.append((name, user_playlists[name]))
-        else:
-            not_found.append(name)
-    
+    # One dict lookup per name; a missing name comes back as None
+    found = [(name, user_playlists.get(name)) for name in playlist_names]
+    playlist_ids = [(name, pid) for name, pid in found if pid is not None]
+    not_found = [name for name, pid in found if pid is None]
     return playlist_ids, not_found
 
 def get_playlist_url_by_name(sp, playlist_name):
     """Gets and prints the Spotify URL for a playlist by its name."""
     print(f"🔍 Searching for playlist: '{playlist_name}'...")
     user_playlists = get_user_playlists(sp) # Returns dict of {name: id}
+    if not isinstance(user_playlists, UserPlaylists):
+        user_playlists = UserPlaylists(user_playlists)
 
     exact_match_id = None
+    matched_name = playlist_name
     case_insensitive_matches = {} # Store as name: id for potential multiple matches
 
     # First pass: Check for exact case-sensitive match
@@ -1352,13 +1872,12 @@ def get_playlist_url_by_name(sp, playlist_name):
         print(f"✅ Found exact match: '{playlist_name}'")
     else:
         # Second pass: Check for case-insensitive matches
-        for name, pid in user_playlists.items():
-            if name.lower() == playlist_name.lower():
-                case_insensitive_matches[name] = pid
+        case_insensitive_matches = dict(user_playlists.matching_ignoring_case(playlist_name))
         
         if len(case_insensitive_matches) == 1:
             first_match_name = list(case_insensitive_matches.keys())[0]
             exact_match_id = case_insensitive_matches[first_match_name]
+            matched_name = first_match_name
             print(f"✅ Found case-insensitive match: '{first_match_name}' (searched for '{playlist_name}')")
         elif len(case_insensitive_matches) > 1:
             print(f"⚠️ Multiple case-insensitive matches found for '{playlist_name}':")
@@ -1373,19 +1892,16 @@ def get_playlist_url_by_name(sp, playlist_name):
             # Select the first name from the *sorted* list
             first_match_name = sorted_matched_names[0] 
             exact_match_id = case_insensitive_matches[first_match_name] # Get the ID using this name
+            matched_name = first_match_name
             
             print(f"⚠️  Returning the first one from the alphabetically sorted list: '{first_match_name}'. Consider using a more specific name.")
             # No exact_match_id = None here, we proceed with the first one
 
     if exact_match_id:
-        try:
-            playlist_details = sp.playlist(exact_match_id)
-            playlist_url = playlist_details['external_urls']['spotify']
-            print(f"🔗 Spotify URL for '{playlist_details['name']}': {playlist_url}")
-            return playlist_url
-        except Exception as e:
-            print(f"❌ Error fetching details for playlist ID {exact_match_id}: {e}")
-            return None
+        # The share URL only depends on the ID, so there's no need to fetch the playlist
+        playlist_url = playlist_url_for_id(exact_match_id)
+        print(f"🔗 Spotify URL for '{matched_name}': {playlist_url}")
+        return playlist_url
     else:
         if not case_insensitive_matches: # Only print if no matches at all were found
             print(f"❌ Playlist '{playlist_name}' not found.")
@@ -1393,63 +1909,248 @@ def get_playlist_url_by_name(sp, playlist_name):
         # The message for multiple matches is already printed above.
         return None
 
-def generate_playlist_qr_code(sp, playlist_name_or_url, output_filename="playlist_qr.png"):
-    """Generates a QR code for a playlist URL and saves it to a file."""
-    playlist_url = None
+# Byte-mode capacity of QR versions 1-10 at error correction level L
+QR_BYTE_CAPACITY_L = (17, 32, 53, 78, 106, 134, 154, 192, 230, 271)
 
-    # Check if it's a URL or a name
-    if playlist_name_or_url.startswith("http") or playlist_name_or_url.startswith("spotify:playlist:"):
-        playlist_url = playlist_name_or_url
-        print(f"ℹ️ Using provided URL: {playlist_url}")
-    else:
-        print(f"ℹ️ '{playlist_name_or_url}' is a name, attempting to find URL...")
-        playlist_url = get_playlist_url_by_name(sp, playlist_name_or_url) # This function already prints messages
+def qr_version_for_payload(data):
+    """
+    Returns the smallest QR version (error correction L, byte mode) that can hold data,
+    or None if it needs a version beyond the precomputed table.
+    """
+    payload_length = len(data.encode('utf-8'))
+    for version, capacity in enumerate(QR_BYTE_CAPACITY_L, 1):
+        if payload_length <= capacity:
+            return version
+    return None
 
+# Inputs that are already a link and are encoded as given
+_URL_PREFIX_RE = re.compile(r'https?://')
+PLAYLIST_URL_TEMPLATE = "https://open.spotify.com/playlist/{}"
+
+def playlist_url_for_id(playlist_id):
+    """Build a playlist's open.spotify.com URL locally, without an API call"""
+    return PLAYLIST_URL_TEMPLATE.format(playlist_id)
+
+def _resolve_playlist_url(sp, playlist_name_or_url):
+    """Returns the playlist URL for a URL/URI/ID or playlist name, or None if a name can't be resolved."""
+    if _URL_PREFIX_RE.match(playlist_name_or_url):
+        print(f"ℹ️ Using provided URL: {playlist_name_or_url}")
+        return playlist_name_or_url
+
+    # spotify:playlist: URIs and bare IDs map straight to a URL; only names need the playlist lookup
+    playlist_id = extract_playlist_id(playlist_name_or_url)
+    if playlist_id:
+        playlist_url = playlist_url_for_id(playlist_id)
+        print(f"ℹ️ Using playlist ID {playlist_id}: {playlist_url}")
+        return playlist_url
+
+    print(f"ℹ️ '{playlist_name_or_url}' is a name, attempting to find URL...")
+    playlist_url = get_playlist_url_by_name(sp, playlist_name_or_url) # This function already prints messages
     if not playlist_url:
         # get_playlist_url_by_name already prints "not found" or error messages
-        # Add a general message here if it was a name and resolution failed.
-        if not (playlist_name_or_url.startswith("http") or playlist_name_or_url.startswith("spotify:playlist:")):
-             print(f"❌ Could not generate QR code because playlist URL for '{playlist_name_or_url}' could not be determined.")
-        # If it was a URL but somehow became None (e.g. future validation), that's an issue.
-        # For now, get_playlist_url_by_name handles its own "not found".
-        return None
+        print(f"❌ Could not generate QR code because playlist URL for '{playlist_name_or_url}' could not be determined.")
+    return playlist_url
 
+def _qr_encoder():
+    """
+    Import the QR encoder on first use: segno if it is installed (pure Python,
+    writes PNGs without Pillow), otherwise qrcode + Pillow from requirements.txt.
+    """
     try:
-        print(f"⚙️ Generating QR code for URL: {playlist_url}...")
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(playlist_url)
-        qr.make(fit=True)
+        import segno
+        return segno
+    except ImportError:
+        import qrcode
+        return qrcode
 
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(output_filename)
+def _render_qr_code(playlist_url, output_filename):
+    """
+    Renders playlist_url as a QR code image and saves it to output_filename.
+    Kept at module level (and free of Spotify calls) so it can run in a worker process.
+    Returns output_filename on success, None on failure.
+    """
+    try:
+        # Playlist URLs are short, so the version is known up front; this skips the
+        # fit loop and the mask-pattern search the encoder would otherwise run.
+        version = qr_version_for_payload(playlist_url)
+        encoder = _qr_encoder()
+        if encoder.__name__ == 'segno':
+            qr = encoder.make(playlist_url, error='l', version=version, mode='byte',
+                              mask=0, micro=False, boost_error=False)
+            qr.save(output_filename, scale=10, border=4, dark="black", light="white")
+        else:
+            qr = encoder.QRCode(
+                version=version,
+                error_correction=encoder.constants.ERROR_CORRECT_L,
+                box_size=10,
+                border=4,
+                mask_pattern=0,
+            )
+            qr.add_data(playlist_url, optimize=0) # Single byte-mode segment, as assumed by the capacity table
+            qr.make(fit=version is None)
+
+            img = qr.make_image(fill_color="black", back_color="white")
+            img.save(output_filename)
         print(f"✅ QR code for playlist URL '{playlist_url}' saved to '{output_filename}'")
         return output_filename
     except Exception as e:
         print(f"❌ Failed to generate or save QR code: {e}")
         return None
 
+def _init_qr_worker():
+    """Pool initializer: pay the QR/imaging imports once per worker process, not per task."""
+    if _qr_encoder().__name__ == 'qrcode':
+        import qrcode.image.pil # Pulls in Pillow
+
+def generate_playlist_qr_code(sp, playlist_name_or_url, output_filename="playlist_qr.png"):
+    """Generates a QR code for a playlist URL and saves it to a file."""
+    playlist_url = _resolve_playlist_url(sp, playlist_name_or_url)
+    if not playlist_url:
+        return None
+
+    print(f"⚙️ Generating QR code for URL: {playlist_url}...")
+    return _render_qr_code(playlist_url, output_filename)
+
+def generate_playlist_qr_codes(sp, items, max_workers=None):
+    """
+    Generates QR codes for many playlists at once.
+
+    Playlist names are resolved to URLs on a thread pool (network-bound), then the images
+    are rendered on a process pool (CPU-bound), so a large batch isn't serialized on the GIL.
+
+    :param sp: spotipy.Spotify client instance
+    :param items: Iterable of (playlist_name_or_url, output_filename) pairs
+    :param max_workers: Worker count for both pools (defaults to the CPU count)
+    :return: A list with the saved filename, or None on failure, for each item in order.
+    """
+    items = list(items)
+    if not items:
+        return []
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        playlist_urls = list(executor.map(lambda item: _resolve_playlist_url(sp, item[0]), items))
+
+    jobs = [(url, filename) for url, (_, filename) in zip(playlist_urls, items) if url]
+    rendered = []
+    if jobs:
+        print(f"⚙️ Generating {len(jobs)} QR code(s)...")
+        with multiprocessing.Pool(processes=min(max_workers, len(jobs)), initializer=_init_qr_worker) as pool:
+            rendered = pool.starmap(_render_qr_code, jobs)
+
+    rendered_iter = iter(rendered)
+    return [next(rendered_iter) if url else None for url in playlist_urls]
+
 def save_config(config):
     """Save configuration back to config.json"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
+    # Serialize before touching the file, so a failure can't leave it truncated
+    if orjson:
+        data = orjson.dumps(config, option=orjson.OPT_INDENT_2) # orjson only supports 2-space indentation
+    else:
+        data = json.dumps(config, indent=4).encode()
+    try:
+        mode = stat.S_IMODE(os.stat(CONFIG_FILE).st_mode) # The new file replaces this one, so it keeps its permissions
+    except FileNotFoundError:
+        mode = 0o600 # It holds client_secret
+    tmp_file = f"{CONFIG_FILE}.tmp"
+    try:
+        with open(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_file, mode)
+        os.replace(tmp_file, CONFIG_FILE) # Atomic: readers see the old file or the new one, never half of it
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except FileNotFoundError:
+            pass
+        raise
+    _read_config.cache_clear() # Don't rely on mtime resolution to notice our own write
     print(f"✅ Configuration saved to {CONFIG_FILE}")
 
+class Config(dict):
+    """
+    The parsed config.json. Serializes as the plain dict it wraps; the genre
+    table is resolved once when it's built and exposed read-only as .genres.
+    """
+    __slots__ = ('genres',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.genres = _genre_table(self)
+
+    def __reduce__(self):
+        # Rebuild through __init__ so copies get their own genre table
+        return (self.__class__, (dict(self),))
+
+class LockedPlaylists(list):
+    """
+    The 'locked_playlists' config list, indexed by playlist ID so lookups are O(1).
+    Entries stay plain {'id': ..., 'name': ...} dicts, so the config serializes as before.
+    Use add()/remove_id() rather than list mutators so the index stays in sync.
+    """
+    __slots__ = ('_by_id',)
+
+    def __init__(self, entries=()):
+        super().__init__(entries)
+        self._by_id = {item['id']: item for item in self if isinstance(item, dict) and 'id' in item}
+
+    def __reduce__(self):
+        # Rebuild through __init__ so copies and pickles get a fresh index
+        return (self.__class__, (list(self),))
+
+    def contains(self, playlist_id) -> bool:
+        return playlist_id in self._by_id
+
+    def ids(self):
+        return self._by_id.keys()
+
+    def add(self, playlist_id, playlist_name) -> bool:
+        """Appends a lock entry. Returns False if the playlist was already locked."""
+        if playlist_id in self._by_id:
+            return False
+        entry = {'id': playlist_id, 'name': playlist_name}
+        self.append(entry)
+        self._by_id[playlist_id] = entry
+        return True
+
+    def remove_id(self, playlist_id):
+        """Removes the lock entry for playlist_id. Returns the removed entry, or None if it wasn't locked."""
+        entry = self._by_id.pop(playlist_id, None)
+        if entry is not None:
+            self[:] = [item for item in self if not (isinstance(item, dict) and item.get('id') == playlist_id)]
+        return entry
+
+def _get_locked_playlists(config):
+    """
+    Returns config['locked_playlists'] as a LockedPlaylists, wrapping a plain list in place
+    (e.g. a config that didn't come from load_config). Returns None if the value isn't a list.
+    """
+    locked_playlists = config.get('locked_playlists', [])
+    if isinstance(locked_playlists, LockedPlaylists):
+        return locked_playlists
+    if not isinstance(locked_playlists, list):
+        return None
+    locked_playlists = LockedPlaylists(locked_playlists)
+    if 'locked_playlists' in config:
+        config['locked_playlists'] = locked_playlists
+    return locked_playlists
+
 def is_playlist_locked(config, playlist_id: str) -> bool:
     """
     Checks if a playlist ID is in the locked_playlists list in the config.
     """
-    locked_playlists = config.get('locked_playlists', [])
-    if not isinstance(locked_playlists, list): # Should be handled by load_config, but defensive check
-        return False 
-    for locked_item in locked_playlists:
-        if isinstance(locked_item, dict) and locked_item.get('id') == playlist_id:
-            return True
-    return False
+    locked_playlists = _get_locked_playlists(config)
+    if locked_playlists is None: # Should be handled by load_config, but defensive check
+        return False
+    return locked_playlists.contains(playlist_id)
+
+def locked_playlist_ids(config) -> frozenset:
+    """
+    Snapshot of the locked playlist IDs, for callers checking many playlists at once
+    (a set lookup per playlist instead of a function call).
+    """
+    locked_playlists = _get_locked_playlists(config)
+    return frozenset(locked_playlists.ids()) if locked_playlists is not None else frozenset()
 
 def lock_playlist(config, playlist_id_to_lock: str, playlist_name_to_lock: str) -> bool:
     """
@@ -1464,12 +2165,10 @@ def lock_playlist(config, playlist_id_to_lock: str, playlist_name_to_lock: str)
         # Depending on strictness, could return False here.
         # For now, we'll allow it to proceed and add to the newly created list.
 
-    if is_playlist_locked(config, playlist_id_to_lock):
+    if not _get_locked_playlists(config).add(playlist_id_to_lock, playlist_name_to_lock):
         print(f"ℹ️ Playlist '{playlist_name_to_lock}' (ID: {playlist_id_to_lock}) is already locked.")
         return False
     
-    lock_entry = {'id': playlist_id_to_lock, 'name': playlist_name_to_lock}
-    config['locked_playlists'].append(lock_entry)
     print(f"🔒 Playlist '{playlist_name_to_lock}' (ID: {playlist_id_to_lock}) has been locked.")
     # Note: save_config(config) must be called separately by the caller.
     return True
@@ -1479,28 +2178,14 @@ def unlock_playlist(config, playlist_id_to_unlock: str) -> bool:
     Removes a playlist from the 'locked_playlists' list in the config.
     Returns True if successfully unlocked, False if not found or error.
     """
-    locked_playlists = config.get('locked_playlists', [])
-    if not isinstance(locked_playlists, list):
+    locked_playlists = _get_locked_playlists(config)
+    if locked_playlists is None:
         print("Error: 'locked_playlists' key is missing or not a list in config. Cannot unlock playlist.", file=sys.stderr)
         return False
 
-    original_length = len(locked_playlists)
-    playlist_name_unlocked = None
-
-    # Rebuild the list excluding the one to unlock
-    # This is safer than modifying while iterating
-    new_locked_list = []
-    found_and_removed = False
-    for item in locked_playlists:
-        if isinstance(item, dict) and item.get('id') == playlist_id_to_unlock:
-            playlist_name_unlocked = item.get('name', playlist_id_to_unlock) # Use name for message if available
-            found_and_removed = True
-            # Don't add it to new_locked_list
-        else:
-            new_locked_list.append(item)
-            
-    if found_and_removed:
-        config['locked_playlists'] = new_locked_list
+    removed_entry = locked_playlists.remove_id(playlist_id_to_unlock)
+    if removed_entry is not None:
+        playlist_name_unlocked = removed_entry.get('name', playlist_id_to_unlock) # Use name for message if available
         print(f"🔓 Playlist '{playlist_name_unlocked}' (ID: {playlist_id_to_unlock}) has been unlocked.")
         # Note: save_config(config) must be called separately by the caller.
         return True
@@ -1508,9 +2193,21 @@ def unlock_playlist(config, playlist_id_to_unlock: str) -> bool:
         print(f"ℹ️ Playlist ID '{playlist_id_to_unlock}' not found in locked list or already unlocked.")
         return False
 
+def _lookup_cached_playlist_name(config, playlist_id):
+    """
+    Returns a playlist name already known locally (the config's locked entries, then the
+    names from the last playlist listing), or None if the Spotify API has to be asked.
+    """
+    locked_playlists = _get_locked_playlists(config)
+    if locked_playlists is not None:
+        for item in locked_playlists:
+            if isinstance(item, dict) and item.get('id') == playlist_id and item.get('name'):
+                return item['name']
+    return _read_playlist_names().get(playlist_id)
+
 def playlist_setup_command():
     """Interactive playlist group setup"""
-    config = load_config()
+    config = load_config(mutable=True)
     
     # Ensure genres section exists
     if 'genres' not in config:
@@ -1537,8 +2234,8 @@ def playlist_setup_command():
             print("Please enter at least one playlist name.")
             continue
         
-        # Clean up playlist names
-        playlists = [name.strip() for name in playlist_input.split(',') if name.strip()]
+        # Clean up playlist names (input is already stripped, so only inner separators remain)
+        playlists = [name for name in _PLAYLIST_NAME_SPLIT_RE.split(playlist_input) if name]
         if not playlists:
             print("Please enter valid playlist names.")
             continue
@@ -1547,10 +2244,10 @@ def playlist_setup_command():
     # Ask about Liked Songs
     while True:
         liked_input = input("Save to Liked Songs for this genre? (y/n): ").strip().lower()
-        if liked_input in ['y', 'yes']:
+        if liked_input in _YES:
             save_to_liked = True
             break
-        elif liked_input in ['n', 'no']:
+        elif liked_input in _NO:
             save_to_liked = False
             break
         else:
@@ -1585,29 +2282,23 @@ def list_playlists_command(search_term=None):
         print("📋 No playlists found.")
         return
     
-    # Filter playlists if search term provided
+    # Filter playlists if search term provided; only the names are needed
     if search_term:
         search_lower = search_term.lower()
-        filtered_playlists = {
-            name: pid for name, pid in user_playlists.items() 
-            if search_lower in name.lower()
-        }
+        names_to_show = sorted(name for name in user_playlists if search_lower in name.lower())
         print(f"🔍 Playlists matching '{search_term}':")
-        playlists_to_show = filtered_playlists
     else:
         print("📋 All your playlists:")
-        playlists_to_show = user_playlists
+        names_to_show = sorted(user_playlists)
     
-    if not playlists_to_show:
+    if not names_to_show:
         print(f"   No playlists found matching '{search_term}'")
         return
     
-    # Sort and display
-    sorted_names = sorted(playlists_to_show.keys())
-    for i, name in enumerate(sorted_names, 1):
-        print(f"   {i:2d}. {name}")
+    # One write for the whole list rather than a print (and flush) per line
+    sys.stdout.write("\n".join(f"   {i:2d}. {name}" for i, name in enumerate(names_to_show, 1)) + "\n")
     
-    print(f"\n📊 Total: {len(playlists_to_show)} playlists")
+    print(f"\n📊 Total: {len(names_to_show)} playlists")
     
     # Show current config genres if no search
     if not search_term and 'genres' in config:
@@ -1639,200 +2330,199 @@ def show_genre_config():
     for genre in config['genres'].keys():
         print(f"   ./spotify_tool.py <song_url> --genre {genre}")
 
-def parse_arguments():
-    """Parse command line arguments"""
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  ./spotify_tool.py setup                                    # First time setup")
-        print("  ./spotify_tool.py --playlist-setup                        # Create new genre group")
-        print("  ./spotify_tool.py --list-playlists [-lp]                  # List all playlists")
-        print("  ./spotify_tool.py --list-playlists 'search' [-lp]         # Search playlists")
-        print("  ./spotify_tool.py --show-config [-sc]                     # Show genre config")
-        print("  ./spotify_tool.py --copy-playlist <source_url_or_id> <new_name> [-cp] # Copy a playlist")
-        print("  ./spotify_tool.py --curate-playlist <source_playlist_id_or_url> [--new-name <playlist_name>] [-cpL] # Curate a playlist")
-        print("  ./spotify_tool.py --get-playlist-url <playlist_name> [-gpu] # Get playlist URL by name")
-        print("  ./spotify_tool.py --generate-qr <playlist_name_or_url> [output.png] [-qr] # Generate QR code for playlist")
-        print("  ./spotify_tool.py --suggest-genres [--time-range <short_term|medium_term|long_term>] [-sg] # Suggest new genres based on your listening habits")
-        print("  ./spotify_tool.py --old-favorites [--suggestions <num>] [-of] # Find old favorite tracks you haven't listened to recently")
-        print("  ./spotify_tool.py --bpm-key-analysis <playlist_url_or_id> [-bka] # Analyze BPM & Key for a playlist")
-        print("  ./spotify_tool.py lock <playlist_url_or_id>                 # Lock a playlist to prevent modifications by some features")
-        print("  ./spotify_tool.py unlock <playlist_url_or_id>               # Unlock a previously locked playlist")
-        print("  ./spotify_tool.py list-locked                               # List all locked playlists")
-        print("  ./spotify_tool.py tui                                       # Launch Textual User Interface")
-        print("  ./spotify_tool.py <song_url1> [song_url2...]                # Add song(s) using default genre")
-        print("  ./spotify_tool.py <song_url1> [song_url2...] --genre <name> [-g] # Add song(s) using specific genre")
+def _print_usage():
+    print("Usage:")
+    print("  ./spotify_tool.py setup                                    # First time setup")
+    print("  ./spotify_tool.py --playlist-setup                        # Create new genre group")
+    print("  ./spotify_tool.py --list-playlists [-lp]                  # List all playlists")
+    print("  ./spotify_tool.py --list-playlists 'search' [-lp]         # Search playlists")
+    print("  ./spotify_tool.py --show-config [-sc]                     # Show genre config")
+    print("  ./spotify_tool.py --copy-playlist <source_url_or_id> <new_name> [-cp] # Copy a playlist")
+    print("  ./spotify_tool.py --curate-playlist <source_playlist_id_or_url> [--new-name <playlist_name>] [-cpL] # Curate a playlist")
+    print("  ./spotify_tool.py --get-playlist-url <playlist_name> [-gpu] # Get playlist URL by name")
+    print("  ./spotify_tool.py --generate-qr <playlist_name_or_url> [output.png] [-qr] # Generate QR code for playlist")
+    print("  ./spotify_tool.py --suggest-genres [--time-range <short_term|medium_term|long_term>] [-sg] # Suggest new genres based on your listening habits")
+    print("  ./spotify_tool.py --old-favorites [--suggestions <num>] [-of] # Find old favorite tracks you haven't listened to recently")
+    print("  ./spotify_tool.py --bpm-key-analysis <playlist_url_or_id> [--refresh-cache] [-bka] # Analyze BPM & Key for a playlist")
+    print("  ./spotify_tool.py lock <playlist_url_or_id>                 # Lock a playlist to prevent modifications by some features")
+    print("  ./spotify_tool.py unlock <playlist_url_or_id>               # Unlock a previously locked playlist")
+    print("  ./spotify_tool.py list-locked                               # List all locked playlists")
+    print("  ./spotify_tool.py tui                                       # Launch Textual User Interface")
+    print("  ./spotify_tool.py <song_url1> [song_url2...]                # Add song(s) using default genre")
+    print("  ./spotify_tool.py <song_url1> [song_url2...] --genre <name> [-g] # Add song(s) using specific genre")
+
+# --- Argument parsers, one per command ---
+# Each takes the flag that selected it and the arguments after it (sys.argv[2:]).
+
+def _parse_setup(flag, args):
+    return {"command": "setup"}
+
+def _parse_tui(flag, args):
+    return {"command": "tui"}
+
+def _parse_lock(flag, args):
+    if len(args) < 1:
+        print("❌ lock command requires a <playlist_id_or_url>")
         sys.exit(1)
-    
-    # Handle special commands
-    if sys.argv[1] == "setup":
-        return {"command": "setup"}
-
-    if sys.argv[1] == "tui":
-        return {"command": "tui"}
-
-    if sys.argv[1] == "lock":
-        if len(sys.argv) < 3:
-            print("❌ lock command requires a <playlist_id_or_url>")
-            sys.exit(1)
-        return {"command": "lock_playlist", "playlist_input": sys.argv[2]}
-
-    if sys.argv[1] == "unlock":
-        if len(sys.argv) < 3:
-            print("❌ unlock command requires a <playlist_id_or_url>")
-            sys.exit(1)
-        return {"command": "unlock_playlist", "playlist_input": sys.argv[2]}
+    return {"command": "lock_playlist", "playlist_input": args[0]}
 
-    if sys.argv[1] == "list-locked":
-        return {"command": "list_locked_playlists"}
+def _parse_unlock(flag, args):
+    if len(args) < 1:
+        print("❌ unlock command requires a <playlist_id_or_url>")
+        sys.exit(1)
+    return {"command": "unlock_playlist", "playlist_input": args[0]}
 
-    if sys.argv[1] in ["--bpm-key-analysis", "-bka"]:
-        if len(sys.argv) < 3:
-            print("❌ bpm-key-analysis command requires a <playlist_id_or_url>")
-            sys.exit(1)
-        # Check for unexpected additional arguments
-        if len(sys.argv) > 3:
-            print(f"❌ Unexpected additional arguments for {sys.argv[1]}: {' '.join(sys.argv[3:])}")
-            sys.exit(1)
-        return {"command": "bpm_key_analysis", "playlist_input": sys.argv[2]}
+def _parse_list_locked(flag, args):
+    return {"command": "list_locked_playlists"}
 
-    if sys.argv[1] in ["--suggest-genres", "-sg"]:
-        time_range = "medium_term" # Default
-        idx = 2
-        if len(sys.argv) > idx :
-            if sys.argv[idx] in ["--time-range", "-tr"]:
+def _parse_bpm_key_analysis(flag, args):
+    if len(args) < 1:
+        print("❌ bpm-key-analysis command requires a <playlist_id_or_url>")
+        sys.exit(1)
+    refresh_cache = "--refresh-cache" in args[1:]
+    extra_args = [arg for arg in args[1:] if arg != "--refresh-cache"]
+    # Check for unexpected additional arguments
+    if extra_args:
+        print(f"❌ Unexpected additional arguments for {flag}: {' '.join(extra_args)}")
+        sys.exit(1)
+    return {"command": "bpm_key_analysis", "playlist_input": args[0], "refresh_cache": refresh_cache}
+
+def _parse_suggest_genres(flag, args):
+    time_range = "medium_term" # Default
+    idx = 0
+    if len(args) > idx :
+        if args[idx] in ("--time-range", "-tr"):
+            idx += 1
+            if len(args) > idx:
+                time_range = args[idx]
                 idx += 1
-                if len(sys.argv) > idx:
-                    time_range = sys.argv[idx]
-                    idx += 1
-                    if time_range not in ['short_term', 'medium_term', 'long_term']:
-                        print(f"❌ Invalid value for --time-range: {time_range}. Must be 'short_term', 'medium_term', or 'long_term'.")
-                        sys.exit(1)
-                else:
-                    print("❌ --time-range flag requires a value (short_term, medium_term, long_term)")
+                if time_range not in ('short_term', 'medium_term', 'long_term'):
+                    print(f"❌ Invalid value for --time-range: {time_range}. Must be 'short_term', 'medium_term', or 'long_term'.")
                     sys.exit(1)
-            elif sys.argv[idx].startswith("-"): # Some other flag
-                 print(f"❌ Unknown option for --suggest-genres: {sys.argv[idx]}")
-                 sys.exit(1)
-            else: # Positional argument, not allowed here if not a value for a known flag
-                 print(f"❌ Unexpected argument for --suggest-genres: {sys.argv[idx]}. Did you mean --time-range?")
-                 sys.exit(1)
-        return {"command": "suggest_genres", "time_range": time_range}
-
-    if sys.argv[1] in ["--old-favorites", "-of"]:
-        num_suggestions = 20 # Default
-        idx = 2
-        if len(sys.argv) > idx:
-            if sys.argv[idx] in ["--suggestions", "-n", "-N"]:
-                idx += 1
-                if len(sys.argv) > idx:
-                    try:
-                        num_suggestions = int(sys.argv[idx])
-                        idx += 1
-                        if num_suggestions <= 0:
-                            print("❌ Number of suggestions must be a positive integer.")
-                            sys.exit(1)
-                    except ValueError:
-                        print(f"❌ Invalid value for --suggestions: '{sys.argv[idx]}' is not a valid integer.")
+            else:
+                print("❌ --time-range flag requires a value (short_term, medium_term, long_term)")
+                sys.exit(1)
+        elif args[idx].startswith("-"): # Some other flag
+             print(f"❌ Unknown option for --suggest-genres: {args[idx]}")
+             sys.exit(1)
+        else: # Positional argument, not allowed here if not a value for a known flag
+             print(f"❌ Unexpected argument for --suggest-genres: {args[idx]}. Did you mean --time-range?")
+             sys.exit(1)
+    return {"command": "suggest_genres", "time_range": time_range}
+
+def _parse_old_favorites(flag, args):
+    num_suggestions = 20 # Default
+    idx = 0
+    if len(args) > idx:
+        if args[idx] in ("--suggestions", "-n", "-N"):
+            idx += 1
+            if len(args) > idx:
+                try:
+                    num_suggestions = int(args[idx])
+                    idx += 1
+                    if num_suggestions <= 0:
+                        print("❌ Number of suggestions must be a positive integer.")
                         sys.exit(1)
-                else:
-                    print("❌ --suggestions flag requires a number.")
+                except ValueError:
+                    print(f"❌ Invalid value for --suggestions: '{args[idx]}' is not a valid integer.")
                     sys.exit(1)
-            elif sys.argv[idx].startswith("-"): # Some other flag
-                 print(f"❌ Unknown option for --old-favorites: {sys.argv[idx]}")
-                 sys.exit(1)
-            else: # Positional argument
-                 print(f"❌ Unexpected argument for --old-favorites: {sys.argv[idx]}. Did you mean --suggestions?")
-                 sys.exit(1)
-        
-        # Check for any remaining unexpected arguments
-        if idx < len(sys.argv):
-            print(f"❌ Unexpected additional arguments for --old-favorites: {' '.join(sys.argv[idx:])}")
-            sys.exit(1)
-
-        return {"command": "old_favorites", "suggestions": num_suggestions}
+            else:
+                print("❌ --suggestions flag requires a number.")
+                sys.exit(1)
+        elif args[idx].startswith("-"): # Some other flag
+             print(f"❌ Unknown option for --old-favorites: {args[idx]}")
+             sys.exit(1)
+        else: # Positional argument
+             print(f"❌ Unexpected argument for --old-favorites: {args[idx]}. Did you mean --suggestions?")
+             sys.exit(1)
     
-    if sys.argv[1] in ["--playlist-setup", "-ps"]:
-        return {"command": "playlist_setup"}
+    # Check for any remaining unexpected arguments
+    if idx < len(args):
+        print(f"❌ Unexpected additional arguments for --old-favorites: {' '.join(args[idx:])}")
+        sys.exit(1)
 
-    if sys.argv[1] in ["--copy-playlist", "-cp"]:
-        if len(sys.argv) < 4:
-            print("❌ --copy-playlist requires <source_playlist_id_or_url> and <new_playlist_name>")
-            sys.exit(1)
-        return {"command": "copy_playlist", "source": sys.argv[2], "name": sys.argv[3]}
+    return {"command": "old_favorites", "suggestions": num_suggestions}
 
-    if sys.argv[1] in ["--curate-playlist", "-cpL"]:
-        if len(sys.argv) < 3:
-            print("❌ --curate-playlist requires <source_playlist_id_or_url>")
-            sys.exit(1)
-        
-        source_playlist_id_or_url = sys.argv[2]
-        new_name = None
-        
-        # Check for optional --new-name argument
-        if len(sys.argv) > 3:
-            if sys.argv[3] == "--new-name":
-                if len(sys.argv) > 4:
-                    new_name = sys.argv[4]
-                else:
-                    print("❌ --new-name flag requires a playlist name")
-                    sys.exit(1)
-            # If there's a 4th argument and it's not --new-name, it's an error,
-            # unless we decide to allow other optional args in the future.
-            # For now, any extra arg not part of --new-name is unexpected.
-            elif sys.argv[3].startswith("-"): # some other flag, not allowed here
-                 print(f"❌ Unknown option after source playlist for --curate-playlist: {sys.argv[3]}")
-                 sys.exit(1)
-            # If it's not a flag, and not --new-name, it's an error as we expect --new-name or nothing
-            else:
-                 print(f"❌ Unexpected argument after source playlist for --curate-playlist: {sys.argv[3]}. Did you mean --new-name?")
-                 sys.exit(1)
-        
-        return {
-            "command": "curate_playlist",
-            "source_playlist_id_or_url": source_playlist_id_or_url,
-            "new_name": new_name
-        }
+def _parse_playlist_setup(flag, args):
+    return {"command": "playlist_setup"}
 
-    if sys.argv[1] in ["--get-playlist-url", "-gpu"]:
-        if len(sys.argv) < 3:
-            print("❌ --get-playlist-url requires <playlist_name>")
-            sys.exit(1)
-        return {"command": "get_playlist_url", "playlist_name": sys.argv[2]}
+def _parse_copy_playlist(flag, args):
+    if len(args) < 2:
+        print("❌ --copy-playlist requires <source_playlist_id_or_url> and <new_playlist_name>")
+        sys.exit(1)
+    return {"command": "copy_playlist", "source": args[0], "name": args[1]}
 
-    if sys.argv[1] in ["--generate-qr", "-qr"]:
-        if len(sys.argv) < 3:
-            print("❌ --generate-qr requires <playlist_name_or_url> [output_filename.png]")
-            sys.exit(1)
-        playlist_name_or_url = sys.argv[2]
-        output_filename = sys.argv[3] if len(sys.argv) > 3 else "playlist_qr.png"
-        # Basic validation for output filename extension
-        if not output_filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-            print(f"⚠️ Warning: Output filename '{output_filename}' does not have a common image extension. Saving as PNG by default if not specified, or as provided.")
-            if len(sys.argv) <= 3 : # if user didn't provide a name, stick to default
-                 output_filename="playlist_qr.png"
-        return {"command": "generate_qr", "playlist_name_or_url": playlist_name_or_url, "output_filename": output_filename}
-
-    if sys.argv[1] in ["--list-playlists", "-lp"]:
-        search_term = sys.argv[2] if len(sys.argv) > 2 else None 
-        # Check if the optional search term is actually another flag
-        if search_term and search_term.startswith("-"):
-            search_term = None # It's a flag, not a search term
-        return {"command": "list_playlists", "search": search_term}
+def _parse_curate_playlist(flag, args):
+    if len(args) < 1:
+        print("❌ --curate-playlist requires <source_playlist_id_or_url>")
+        sys.exit(1)
     
-    if sys.argv[1] in ["--show-config", "-sc"]:
-        return {"command": "show_config"}
+    source_playlist_id_or_url = args[0]
+    new_name = None
     
-    # Handle song URL with optional genre
-    # Handle song URL(s) with optional genre
-    # All other commands start with a flag or are 'setup'
+    # Check for optional --new-name argument
+    if len(args) > 1:
+        if args[1] == "--new-name":
+            if len(args) > 2:
+                new_name = args[2]
+            else:
+                print("❌ --new-name flag requires a playlist name")
+                sys.exit(1)
+        # If there's a 4th argument and it's not --new-name, it's an error,
+        # unless we decide to allow other optional args in the future.
+        # For now, any extra arg not part of --new-name is unexpected.
+        elif args[1].startswith("-"): # some other flag, not allowed here
+             print(f"❌ Unknown option after source playlist for --curate-playlist: {args[1]}")
+             sys.exit(1)
+        # If it's not a flag, and not --new-name, it's an error as we expect --new-name or nothing
+        else:
+             print(f"❌ Unexpected argument after source playlist for --curate-playlist: {args[1]}. Did you mean --new-name?")
+             sys.exit(1)
     
+    return {
+        "command": "curate_playlist",
+        "source_playlist_id_or_url": source_playlist_id_or_url,
+        "new_name": new_name
+    }
+
+def _parse_get_playlist_url(flag, args):
+    if len(args) < 1:
+        print("❌ --get-playlist-url requires <playlist_name>")
+        sys.exit(1)
+    return {"command": "get_playlist_url", "playlist_name": args[0]}
+
+def _parse_generate_qr(flag, args):
+    if len(args) < 1:
+        print("❌ --generate-qr requires <playlist_name_or_url> [output_filename.png]")
+        sys.exit(1)
+    playlist_name_or_url = args[0]
+    output_filename = args[1] if len(args) > 1 else "playlist_qr.png"
+    # Basic validation for output filename extension
+    if not output_filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
+        print(f"⚠️ Warning: Output filename '{output_filename}' does not have a common image extension. Saving as PNG by default if not specified, or as provided.")
+        if len(args) <= 1 : # if user didn't provide a name, stick to default
+             output_filename="playlist_qr.png"
+    return {"command": "generate_qr", "playlist_name_or_url": playlist_name_or_url, "output_filename": output_filename}
+
+def _parse_list_playlists(flag, args):
+    search_term = args[0] if len(args) > 0 else None 
+    # Check if the optional search term is actually another flag
+    if search_term and search_term.startswith("-"):
+        search_term = None # It's a flag, not a search term
+    return {"command": "list_playlists", "search": search_term}
+
+def _parse_show_config(flag, args):
+    return {"command": "show_config"}
+
+def _parse_add_song(argv):
+    """Parses '<song_url1> [song_url2...] [--genre <name>]' (argv excludes the script name)."""
     song_urls = []
     genre = None
-    idx = 1 # Start parsing from the first argument after script name
+    idx = 0
     
     # Collect song URLs
-    while idx < len(sys.argv) and not sys.argv[idx].startswith("-"):
-        song_urls.append(sys.argv[idx])
+    while idx < len(argv) and not argv[idx].startswith("-"):
+        song_urls.append(argv[idx])
         idx += 1
         
     if not song_urls:
@@ -1845,25 +2535,68 @@ def parse_arguments():
         sys.exit(1)
 
     # Check for genre argument after song URLs
-    if idx < len(sys.argv): # If there are more arguments
-        if sys.argv[idx] in ['--genre', '-g']:
-            if idx + 1 < len(sys.argv):
-                genre = sys.argv[idx+1]
+    if idx < len(argv): # If there are more arguments
+        if argv[idx] in ('--genre', '-g'):
+            if idx + 1 < len(argv):
+                genre = argv[idx+1]
                 idx += 2 # Consumed --genre and its value
             else:
                 print("❌ --genre flag requires a genre name")
                 sys.exit(1)
         # If there are more args after URLs but not a genre flag, it's an error
-        elif idx < len(sys.argv):
-             print(f"❌ Unknown argument after song URLs: {sys.argv[idx]}")
+        elif idx < len(argv):
+             print(f"❌ Unknown argument after song URLs: {argv[idx]}")
              sys.exit(1)
 
     return {"command": "add_song", "urls": song_urls, "genre": genre}
 
+# Every spelling of a command, mapped to its parser (a single dict probe per dispatch)
+CMD_ALIASES = {
+    "setup": _parse_setup,
+    "tui": _parse_tui,
+    "lock": _parse_lock,
+    "unlock": _parse_unlock,
+    "list-locked": _parse_list_locked,
+    "--bpm-key-analysis": _parse_bpm_key_analysis, "-bka": _parse_bpm_key_analysis,
+    "--suggest-genres": _parse_suggest_genres, "-sg": _parse_suggest_genres,
+    "--old-favorites": _parse_old_favorites, "-of": _parse_old_favorites,
+    "--playlist-setup": _parse_playlist_setup, "-ps": _parse_playlist_setup,
+    "--copy-playlist": _parse_copy_playlist, "-cp": _parse_copy_playlist,
+    "--curate-playlist": _parse_curate_playlist, "-cpL": _parse_curate_playlist,
+    "--get-playlist-url": _parse_get_playlist_url, "-gpu": _parse_get_playlist_url,
+    "--generate-qr": _parse_generate_qr, "-qr": _parse_generate_qr,
+    "--list-playlists": _parse_list_playlists, "-lp": _parse_list_playlists,
+    "--show-config": _parse_show_config, "-sc": _parse_show_config,
+}
+
+def parse_arguments():
+    """Parse command line arguments"""
+    if len(sys.argv) < 2:
+        _print_usage()
+        sys.exit(1)
+    
+    # Handle special commands
+    parser = CMD_ALIASES.get(sys.argv[1])
+    if parser is not None:
+        return parser(sys.argv[1], sys.argv[2:])
+
+    # Anything else is song URL(s) with optional genre
+    return _parse_add_song(sys.argv[1:])
+
+# Commands whose handlers just need a ready client; they share one setup path in main()
+SPOTIFY_CLIENT_COMMANDS = frozenset({
+    "copy_playlist", "curate_playlist", "suggest_genres", "old_favorites",
+    "get_playlist_url", "generate_qr",
+})
+
 def main():
     args = parse_arguments()
     command = args.get("command")
 
+    if command in SPOTIFY_CLIENT_COMMANDS:
+        config = load_config()
+        sp = setup_spotify_client(config)
+
     if command == "setup":
         setup_command()
     elif command == "playlist_setup":
@@ -1875,21 +2608,13 @@ def main():
     elif command == "copy_playlist":
         source_playlist_id_or_url = args.get("source")
         new_playlist_name = args.get("name")
-        config = load_config() # Needed for sp client
-        sp = setup_spotify_client(config)
         copy_playlist(sp, source_playlist_id_or_url, new_playlist_name)
     elif command == "curate_playlist":
         source_playlist_input = args.get("source_playlist_id_or_url")
         new_name_input = args.get("new_name")
-        # Initialize Spotify client here as it's needed by the command
-        config = load_config()
-        sp = setup_spotify_client(config)
         curate_playlist_command(sp, source_playlist_input, new_name_input)
     elif command == "suggest_genres":
         time_range_arg = args.get("time_range", "medium_term")
-        config = load_config()
-        sp = setup_spotify_client(config)
-
         print(f"🔍 Fetching your top artists and genres for time range: {time_range_arg}...")
         artist_ids, current_genres = get_user_top_artists_and_genres(sp, time_range=time_range_arg)
 
@@ -1922,9 +2647,6 @@ def main():
 
     elif command == "old_favorites":
         num_suggestions_arg = args.get("suggestions", 20)
-        config = load_config()
-        sp = setup_spotify_client(config)
-
         print(" nostalgIA: Searching for those golden oldies you might have forgotten...")
         print("--------------------------------------------------------------------")
         print("🎧 Fetching your top tracks (long term)...")
@@ -1969,24 +2691,27 @@ def main():
 
     elif command == "lock_playlist":
         playlist_input_arg = args.get("playlist_input")
-        config = load_config()
-        sp = setup_spotify_client(config)
+        config = load_config(mutable=True)
         
         playlist_id = extract_playlist_id(playlist_input_arg)
         if not playlist_id:
             print(f"❌ Could not extract a valid playlist ID from '{playlist_input_arg}'.")
             sys.exit(1)
-            
-        try:
-            playlist_details = sp.playlist(playlist_id)
-            playlist_name = playlist_details.get('name', playlist_id) # Default to ID if name not found
-        except spotipy.SpotifyException as e:
-            print(f"❌ Error fetching playlist details for ID '{playlist_id}': {e}")
-            print("   Please ensure the playlist ID or URL is correct and you have access to it.")
-            sys.exit(1)
-        except Exception as e:
-            print(f"❌ An unexpected error occurred while fetching playlist details: {e}")
-            sys.exit(1)
+
+        # Only authenticate and hit the API if the name isn't already known locally
+        playlist_name = _lookup_cached_playlist_name(config, playlist_id)
+        if playlist_name is None:
+            sp = setup_spotify_client(config)
+            try:
+                playlist_details = _call(sp.playlist, playlist_id)
+                playlist_name = playlist_details.get('name', playlist_id) # Default to ID if name not found
+            except spotipy.SpotifyException as e:
+                print(f"❌ Error fetching playlist details for ID '{playlist_id}': {e}")
+                print("   Please ensure the playlist ID or URL is correct and you have access to it.")
+                sys.exit(1)
+            except Exception as e:
+                print(f"❌ An unexpected error occurred while fetching playlist details: {e}")
+                sys.exit(1)
 
         if lock_playlist(config, playlist_id, playlist_name):
             save_config(config)
@@ -1994,7 +2719,7 @@ def main():
 
     elif command == "unlock_playlist":
         playlist_input_arg = args.get("playlist_input")
-        config = load_config()
+        config = load_config(mutable=True)
         # sp = setup_spotify_client(config) # Not strictly needed for unlock by ID if not verifying name
         
         playlist_id = extract_playlist_id(playlist_input_arg)
@@ -2037,15 +2762,29 @@ def main():
             print(f"❌ Invalid playlist URL or ID: '{playlist_input_arg}'")
             sys.exit(1)
         
-        try:
-            playlist_details = sp.playlist(playlist_id, fields="name") # Just need name for title
-            playlist_title = playlist_details.get('name', playlist_id)
-        except Exception as e:
-            print(f"Could not fetch playlist name for ID {playlist_id}: {e}")
-            playlist_title = playlist_id # Default to ID if name fetch fails
+        print(f"\n📊 Fetching audio features for playlist: '{playlist_id}' (this may take a moment)...")
+        # The title and the features are independent requests, so overlap them
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            name_future = executor.submit(_call, sp.playlist, playlist_id, fields="name,tracks(total)") # Title and size only
+            features_future = executor.submit(get_audio_features_for_playlist, sp, playlist_id,
+                                              refresh_cache=args.get("refresh_cache", False))
+
+            playlist_total = None
+            try:
+                playlist_details = name_future.result()
+                playlist_title = playlist_details.get('name', playlist_id)
+                playlist_total = (playlist_details.get('tracks') or {}).get('total')
+            except Exception as e:
+                print(f"Could not fetch playlist name for ID {playlist_id}: {e}")
+                playlist_title = playlist_id # Default to ID if name fetch fails
+
+            if playlist_total == 0:
+                # Nothing to analyze. The feature fetch is already running, and leaving the
+                # executor waits for it, but it stops after its first (empty) page
+                print(f"ℹ️ Playlist '{playlist_title}' is empty, nothing to analyze.")
+                sys.exit(0)
 
-        print(f"\n📊 Fetching audio features for playlist: '{playlist_title}' (this may take a moment)...")
-        tracks_with_features = get_audio_features_for_playlist(sp, playlist_id)
+            tracks_with_features = features_future.result()
 
         if not tracks_with_features:
             print("❌ Could not retrieve audio features or the playlist is empty.")
@@ -2067,9 +2806,11 @@ def main():
             print("    - No key information found for tracks in this playlist.")
         
         print("\n--- Track Details ---")
-        header = f"{'No.':<4} | {'Track Name':<35.35} | {'Artist':<25.25} | {'BPM':<6} | {'Key':<12} | {'Camelot':<7}"
-        print(header)
-        print("-" * len(header))
+        header = TRACK_DETAILS_ROW_FORMAT.format('No.', 'Track Name', 'Artist', 'BPM', 'Key', 'Camelot')
+        separator = "-" * len(header)
+        # Build the whole table and write it once rather than one print per track
+        rows = [header, separator]
+        row_format = TRACK_DETAILS_ROW_FORMAT.format
         
         if analysis_summary['processed_tracks']:
             for idx, track in enumerate(analysis_summary['processed_tracks'], 1):
@@ -2078,14 +2819,22 @@ def main():
                 camelot_display = track.get('camelot_key', '-')
                 
                 # Ensure all parts are strings for formatting
-                print(f"{idx:<4} | {str(track.get('name', 'N/A')):<35.35} | {str(track.get('artist', 'N/A')):<25.25} | {bpm_display:<6} | {key_display:<12} | {camelot_display:<7}")
+                name = str(track.get('name', 'N/A'))
+                artist = str(track.get('artist', 'N/A'))
+                rows.append(row_format(idx, name, artist, bpm_display, key_display, camelot_display))
         else:
-            print("  No track details to display.")
-        print("-" * len(header))
+            rows.append("  No track details to display.")
+        rows.append(separator)
+        sys.stdout.write("\n".join(rows) + "\n")
 
     elif command == "tui":
+        # Cheap presence check; Textual itself is only imported when the TUI is launched
+        if importlib.util.find_spec("textual") is None or importlib.util.find_spec("spotify_tui") is None:
+            print("❌ Textual library not found or TUI could not be imported.")
+            print("   Please ensure 'textual' is installed: pip install textual")
+            return
         try:
-            from spotify_tui import SpotifyTUI
+            SpotifyTUI = importlib.import_module("spotify_tui").SpotifyTUI
             app = SpotifyTUI()
             app.run()
             print("Exited TUI.")
@@ -2097,14 +2846,10 @@ def main():
             
     elif command == "get_playlist_url":
         playlist_name = args.get("playlist_name")
-        config = load_config() # Needed for sp client
-        sp = setup_spotify_client(config)
         get_playlist_url_by_name(sp, playlist_name)
     elif command == "generate_qr":
         playlist_name_or_url = args.get("playlist_name_or_url")
         output_filename = args.get("output_filename")
-        config = load_config() # Needed for sp client
-        sp = setup_spotify_client(config)
         generate_playlist_qr_code(sp, playlist_name_or_url, output_filename)
     elif command == "add_song":
         song_urls = args.get("urls", []) # Default to empty list
@@ -2114,59 +2859,85 @@ def main():
             print("❌ No song URLs provided to add.")
             sys.exit(1)
 
+        # Drop repeated URLs (keeping order) so they aren't resolved or processed twice
+        unique_song_urls = list(dict.fromkeys(song_urls))
+        if len(unique_song_urls) < len(song_urls):
+            print(f"ℹ️ Ignoring {len(song_urls) - len(unique_song_urls)} duplicate song URL(s).")
+            song_urls = unique_song_urls
+
         config = load_config()
+
+        # Get genre-specific or default playlist configuration once for the whole run.
+        # Resolved before the client so an unknown genre exits without any OAuth work.
+        try:
+            genre_config_details = get_genre_config(config, genre)
+        except KeyError:
+            if 'genres' not in config:
+                print("❌ No 'genres' section found in config")
+            else:
+                print(f"❌ Genre '{genre or 'default'}' not found in config")
+                print(f"Available genres: {', '.join(get_genre_names(config))}")
+            sys.exit(1)
+        playlist_names_to_add = genre_config_details.get('playlists', [])
+        save_to_liked = genre_config_details.get('save_to_liked', False)
+
         sp = setup_spotify_client(config) # Initialize Spotify client
         
         total_songs = len(song_urls)
-        songs_processed_successfully = 0
+        track_ids = []
+        seen_track_ids = set()
 
+        # Listing the user's playlists doesn't depend on the songs, so run it in the
+        # background while short links are followed and track IDs extracted
+        lookup_executor = ThreadPoolExecutor(max_workers=1)
+        playlist_lookup = lookup_executor.submit(find_playlist_ids, sp, playlist_names_to_add)
+        lookup_executor.shutdown(wait=False)
+
+        # Follow short links up front, in parallel, so the loop below sees full track URLs
+        resolved_urls = resolve_short_links(song_urls)
+
+        # Resolve every URL first so each playlist gets one batched write
         for i, song_url in enumerate(song_urls):
             print(f"\nProcessing song {i+1}/{total_songs}: {song_url}")
-            track_id = extract_track_id(song_url)
+            track_id = extract_track_id(resolved_urls[i])
             if not track_id:
                 print(f"❌ Could not extract track ID from URL: {song_url}")
-                if "spotify.link/" in song_url: # Check specifically for short links
-                     print(f"ℹ️ Note: Spotify short links (spotify.link/) might need to be resolved to a full track URL first if direct extraction fails.")
+                if _is_short_link(song_url): # Check specifically for short links
+                     print(f"ℹ️ Note: This short link didn't lead to a track URL. Check the link, or use the full open.spotify.com track URL.")
                 continue # Skip to the next song
 
-            print(f"🎵 Attempting to add track: {track_id}")
-
-            # Get genre-specific or default playlist configuration
-            genre_config_details = get_genre_config(config, genre) 
-            playlist_names_to_add = genre_config_details.get('playlists', [])
-            save_to_liked = genre_config_details.get('save_to_liked', False)
+            if track_id in seen_track_ids:
+                print(f"ℹ️ Track {track_id} is already queued, skipping duplicate.")
+                continue
+            seen_track_ids.add(track_id)
+            track_ids.append(track_id)
+            print(f"🎵 Queued track: {track_id}")
 
-            # Find playlist IDs for the names from the config
-            target_playlist_ids, not_found_playlists = find_playlist_ids(sp, playlist_names_to_add)
+        songs_processed_successfully = 0
+        if track_ids:
+            # Playlist IDs for the names from the config
+            target_playlist_ids, not_found_playlists = playlist_lookup.result()
 
             if not_found_playlists:
-                print(f"⚠️ The following playlists from your config were not found on your Spotify account and will be skipped for this song: {', '.join(not_found_playlists)}")
-            
+                print(f"⚠️ The following playlists from your config were not found on your Spotify account and will be skipped: {', '.join(not_found_playlists)}")
+
             if not target_playlist_ids and not save_to_liked:
-                print(f"No valid playlists found to add song {track_id} to, and not saving to Liked Songs. Skipping this song.")
-                continue
-            
-            print(f"👍 Adding {track_id} to {len(target_playlist_ids)} playlist(s) and Liked Songs is set to: {'Yes' if save_to_liked else 'No'}")
-            # add_to_playlists returns a list of tuples: (playlist_name, success_status, error_message)
-            results = add_to_playlists(sp, track_id, target_playlist_ids, save_to_liked)
-            
-            # Check if all operations for this track were successful
-            # For simplicity, we can count successful additions.
-            # A more robust check might ensure all intended operations succeeded.
-            # Iterate through results to print them for CLI mode
-            # Pass config to add_to_playlists
-            results = add_to_playlists(sp, track_id, target_playlist_ids, save_to_liked, config=config) # Pass config
-            
-            song_had_at_least_one_success = False
-            for name, success, error_msg in results:
-                if success:
-                    print(f"✅ Added to: {name}")
-                    song_had_at_least_one_success = True
-                else:
-                    print(f"❌ Failed to add to {name}: {error_msg if error_msg else 'Failed'}") # Ensure error_msg is printed
-            
-            if song_had_at_least_one_success:
-                songs_processed_successfully += 1
+                print("No valid playlists found to add songs to, and not saving to Liked Songs. Nothing to do.")
+            else:
+                print(f"\n👍 Adding {len(track_ids)} track(s) to {len(target_playlist_ids)} playlist(s) and Liked Songs is set to: {'Yes' if save_to_liked else 'No'}")
+                # add_to_playlists returns a list of tuples: (playlist_name, success_status, error_message)
+                results = add_to_playlists(sp, track_ids, target_playlist_ids, save_to_liked, config=config)
+
+                had_at_least_one_success = False
+                for name, success, error_msg in results:
+                    if success:
+                        print(f"✅ Added to: {name}")
+                        had_at_least_one_success = True
+                    else:
+                        print(f"❌ Failed to add to {name}: {error_msg if error_msg else 'Failed'}") # Ensure error_msg is printed
+
+                if had_at_least_one_success:
+                    songs_processed_successfully = len(track_ids)
 
         print(f"\n🎉 All tasks complete! {songs_processed_successfully}/{total_songs} song(s) processed with at least one successful addition.")
     else:
@@ -1,5 +1,6 @@
 import unittest
-from unittest.mock import patch, Mock, call, MagicMock, StringIO
+from unittest.mock import patch, Mock, call
+from io import StringIO
 import sys
 import os
 
@@ -28,27 +29,56 @@ from spotify_tool import (
     main,               # For testing main command handling
     load_config,        # For testing main command handling
     setup_spotify_client, # For testing main command handling
-    save_config         # For testing main command handling
+    save_config,        # For testing main command handling
+    qr_version_for_payload,
+    generate_playlist_qr_codes,
+    LockedPlaylists,
+    fetch_all_playlist_items,
+    resolve_short_links,
+    get_audio_features_for_playlist,
+    get_user_playlists,
+    with_backoff,
+    copy_playlist,
+    get_genre_config,
+    locked_playlist_ids,
+    _lazy_import,
+    _lookup_cached_playlist_name
 )
 import datetime 
 import spotipy 
+import tempfile
+import threading
 
 # --- Existing Test Classes (Keep them as they are, condensed for brevity here) ---
+# Patched once for the class; every test gets the mock constructor as its last argument
+@patch('spotify_tool.spotipy.Spotify', spec=True)
 class TestGetTrackDetails(unittest.TestCase):
-    @patch('spotify_tool.spotipy.Spotify')
     def test_successful_fetch(self, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; track_ids = ["track1", "track2"]
-        mock_sp.audio_features.side_effect = [[{'id': 'track1', 'danceability': 0.7}], [{'id': 'track2', 'danceability': 0.8}]]
-        mock_sp.track.side_effect = [{'id': 'track1', 'artists': [{'id': 'artist1', 'name': 'Artist One'}]}, {'id': 'track2', 'artists': [{'id': 'artist2', 'name': 'Artist Two'}]}]
-        mock_sp.artist.side_effect = [{'id': 'artist1', 'genres': ['pop', 'rock']}, {'id': 'artist2', 'genres': ['electronic', 'dance']}]
+        mock_sp.audio_features.return_value = [{'id': 'track1', 'danceability': 0.7}, {'id': 'track2', 'danceability': 0.8}]
+        mock_sp.tracks.return_value = {'tracks': [{'id': 'track1', 'artists': [{'id': 'artist1', 'name': 'Artist One'}]}, {'id': 'track2', 'artists': [{'id': 'artist2', 'name': 'Artist Two'}]}]}
+        mock_sp.artists.return_value = {'artists': [{'id': 'artist1', 'genres': ['pop', 'rock']}, {'id': 'artist2', 'genres': ['electronic', 'dance']}]}
         expected_details = [{'id': 'track1', 'audio_features': {'id': 'track1', 'danceability': 0.7}, 'artist_genres': ['pop', 'rock']}, {'id': 'track2', 'audio_features': {'id': 'track2', 'danceability': 0.8}, 'artist_genres': ['dance', 'electronic']}]
         result = get_track_details(mock_sp, track_ids)
         for item in expected_details: item['artist_genres'].sort()
         self.assertEqual(result, expected_details)
+        mock_sp.audio_features.assert_called_once_with(tracks=track_ids)
+        mock_sp.tracks.assert_called_once_with(track_ids)
+        mock_sp.artists.assert_called_once_with(['artist1', 'artist2'])
+
+    def test_duplicate_ids_fetched_once(self, mock_sp_constructor):
+        mock_sp = mock_sp_constructor.return_value; track_ids = ["track1", "track2", "track1"]
+        mock_sp.audio_features.return_value = [{'id': 'track1', 'tempo': 120.0}, {'id': 'track2', 'tempo': 128.0}]
+        mock_sp.tracks.return_value = {'tracks': [{'id': 'track1', 'artists': [{'id': 'artist1'}]}, {'id': 'track2', 'artists': [{'id': 'artist1'}]}]}
+        mock_sp.artists.return_value = {'artists': [{'id': 'artist1', 'genres': ['house']}]}
+        result = get_track_details(mock_sp, track_ids)
+        self.assertEqual([item['id'] for item in result], track_ids) # One entry per occurrence
+        mock_sp.audio_features.assert_called_once_with(tracks=["track1", "track2"])
+        mock_sp.tracks.assert_called_once_with(["track1", "track2"])
 
 class TestAnalyzePlaylistMoodGenre(unittest.TestCase):
     @patch('spotify_tool.get_track_details')
-    @patch('spotify_tool.spotipy.Spotify') 
+    @patch('spotify_tool.spotipy.Spotify', spec=True) 
     @patch('spotify_tool.extract_playlist_id')
     def test_successful_analysis(self, mock_extract_id, mock_sp_constructor, mock_get_track_details):
         mock_sp = mock_sp_constructor.return_value ; playlist_id_or_url = "some_playlist_url"; extracted_id = "playlist123"; mock_extract_id.return_value = extracted_id
@@ -66,7 +96,7 @@ class TestAnalyzePlaylistMoodGenre(unittest.TestCase):
         for feature, avg_val in expected_analysis['average_audio_features'].items(): self.assertAlmostEqual(result['average_audio_features'][feature], avg_val, places=5)
 
 class TestGetRecommendations(unittest.TestCase):
-    @patch('spotify_tool.spotipy.Spotify')
+    @patch('spotify_tool.spotipy.Spotify', spec=True)
     def test_successful_recommendations(self, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; analysis_results = {'seed_tracks': ['trackA', 'trackB', 'trackC', 'trackD', 'trackE'], 'top_genres': ['pop', 'rock', 'electronic', 'dance', 'hip hop'], 'average_audio_features': {'danceability': 0.7, 'energy': 0.8, 'valence': 0.6, 'tempo': 120.0}}
         mock_sp.track.side_effect = [{'artists': [{'id': 'artistA'}]}, {'artists': [{'id': 'artistB'}]}]
@@ -78,13 +108,26 @@ class TestGetRecommendations(unittest.TestCase):
         mock_sp.recommendations.assert_called_once_with(seed_artists=expected_seed_artist_ids, seed_genres=expected_seed_genres, seed_tracks=expected_seed_tracks_uris, limit=10, **expected_target_features)
 
 class TestPlaylistHelpers(unittest.TestCase):
-    @patch('spotify_tool.spotipy.Spotify')
+    @patch('spotify_tool.spotipy.Spotify', spec=True)
     @patch('spotify_tool.datetime.date') 
     def test_determine_new_playlist_name(self, mock_date, mock_sp_constructor):
-        mock_sp = mock_sp_constructor.return_value; mock_today = datetime.date(2023, 10, 26); mock_date.today.return_value = mock_today; date_str = "2023-10-26"
+        mock_sp = mock_sp_constructor.return_value; date_str = "2023-10-26"; mock_date.today.return_value.isoformat.return_value = date_str # datetime.date itself is the mock here
         name = determine_new_playlist_name(mock_sp, "source_id", "My Custom Name"); self.assertEqual(name, "My Custom Name")
         mock_sp.playlist.return_value = {'name': 'Old Playlist'}; name = determine_new_playlist_name(mock_sp, "source_id_good"); self.assertEqual(name, f"Curated - Old Playlist - {date_str}")
 
+class TestGetGenreConfig(unittest.TestCase):
+    def test_genre_lookup_and_legacy_format(self):
+        config = {'genres': {'default': {'playlists': ['A']}, 'rock': {'playlists': ['B'], 'save_to_liked': True}}}
+        self.assertEqual(get_genre_config(config), {'playlists': ['A']})
+        self.assertEqual(get_genre_config(config, 'rock')['playlists'], ['B'])
+        self.assertEqual(get_genre_config({'playlists': ['Old']}, 'rock'), {'playlists': ['Old'], 'save_to_liked': False})
+
+    def test_unknown_genre_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            get_genre_config({'genres': {'default': {'playlists': []}}}, 'jazz')
+        with self.assertRaises(KeyError):
+            get_genre_config({})
+
 class TestCuratePlaylistCommand(unittest.TestCase):
     @patch('spotify_tool.populate_playlist_with_tracks')
     @patch('spotify_tool.create_empty_playlist')
@@ -92,22 +135,20 @@ class TestCuratePlaylistCommand(unittest.TestCase):
     @patch('spotify_tool.get_recommendations')
     @patch('spotify_tool.analyze_playlist_mood_genre')
     @patch('spotify_tool.extract_playlist_id')
-    @patch('spotify_tool.spotipy.Spotify') 
+    @patch('spotify_tool.spotipy.Spotify', spec=True) 
     def test_curate_playlist_successful_flow(self, mock_sp_constructor, mock_extract, mock_analyze, mock_recommend, mock_determine_name, mock_create_playlist, mock_populate):
         mock_sp = mock_sp_constructor.return_value; source_url = "http://source.playlist.url"; provided_new_name = "My New Curated Mix"
         mock_extract.return_value = "source_playlist_123"; mock_analyze.return_value = {'seed_tracks': ['s1'], 'top_genres': ['g1'], 'average_audio_features': {'energy': 0.7}}; mock_recommend.return_value = ['rec_track1', 'rec_track2']; mock_determine_name.return_value = "Final Playlist Name"; mock_create_playlist.return_value = "new_playlist_id_abc"; mock_populate.return_value = 2 
         result = curate_playlist_command(mock_sp, source_url, provided_new_name); self.assertTrue(result)
 
+@patch('spotify_tool.spotipy.Spotify', spec=True)
+@patch('sys.stderr', new_callable=StringIO)
 class TestSuggestGenresFunctionality(unittest.TestCase):
-    @patch('spotify_tool.spotipy.Spotify')
-    @patch('sys.stderr', new_callable=StringIO) 
     def test_get_user_top_artists_and_genres_success(self, mock_stderr, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; mock_sp.current_user_top_artists.return_value = {'items': [{'id': 'artist1', 'genres': ['pop', 'rock']}, {'id': 'artist2', 'genres': ['rock', 'electronic']}, {'id': 'artist3', 'genres': ['jazz']}]}
         artist_ids, genres = get_user_top_artists_and_genres(mock_sp, time_range='short_term', limit=3)
         self.assertEqual(artist_ids, ['artist1', 'artist2', 'artist3']); self.assertEqual(genres, {'pop', 'rock', 'electronic', 'jazz'})
 
-    @patch('spotify_tool.spotipy.Spotify')
-    @patch('sys.stderr', new_callable=StringIO)
     def test_get_genre_suggestions_success(self, mock_stderr, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; current_artist_ids = ['artistA', 'artistB']; current_genres_set = {'pop', 'rock'}
         mock_sp.recommendations.return_value = {'tracks': [{'artists': [{'id': 'artistC'}]}, {'artists': [{'id': 'artistD'}]}, {'artists': [{'id': 'artistE'}]}, {'artists': [{'id': 'artistF'}]}  ]}
@@ -117,14 +158,14 @@ class TestSuggestGenresFunctionality(unittest.TestCase):
         self.assertCountEqual(suggestions['new-wave']['artists'], ['Artist C', 'Artist F'])
 
 class TestOldFavoritesFinderFunctionality(unittest.TestCase):
-    @patch('spotify_tool.spotipy.Spotify')
+    @patch('spotify_tool.spotipy.Spotify', spec=True)
     @patch('sys.stderr', new_callable=StringIO)
     def test_get_user_top_tracks_success(self, mock_stderr, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; mock_sp.current_user_top_tracks.return_value = {'items': [{'id': 't1', 'name': 'Track 1', 'artists': [{'name': 'Artist A'}]}, {'id': 't2', 'name': 'Track 2', 'artists': [{'name': 'Artist B'}]}]}
         tracks = get_user_top_tracks_by_time_range(mock_sp, 'medium_term', limit=2)
         self.assertEqual(tracks, [{'id': 't1', 'name': 'Track 1', 'artist': 'Artist A'}, {'id': 't2', 'name': 'Track 2', 'artist': 'Artist B'}])
 
-    @patch('spotify_tool.spotipy.Spotify')
+    @patch('spotify_tool.spotipy.Spotify', spec=True)
     @patch('sys.stderr', new_callable=StringIO)
     def test_get_user_recently_played_success(self, mock_stderr, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value; mock_sp.current_user_recently_played.return_value = {'items': [{'track': {'id': 't_rec1', 'name': 'Recent Track 1', 'artists': [{'name': 'Artist X'}]}}, {'track': {'id': 't_rec2', 'name': 'Recent Track 2', 'artists': [{'name': 'Artist Y'}]}}]}
@@ -134,9 +175,232 @@ class TestOldFavoritesFinderFunctionality(unittest.TestCase):
     def test_find_old_favorites_core_logic(self):
         track1 = {'id': '1', 'name': 'Track 1', 'artist': 'Artist A'}; track2 = {'id': '2', 'name': 'Track 2', 'artist': 'Artist B'}; track3 = {'id': '3', 'name': 'Track 3', 'artist': 'Artist C'}; track4 = {'id': '4', 'name': 'Track 4', 'artist': 'Artist D'}; track5 = {'id': '5', 'name': 'Track 5', 'artist': 'Artist E'}; track6 = {'id': '6', 'name': 'Track 6', 'artist': 'Artist F'}
         long_term = [track1, track2, track3, track4, track5, track6]; medium_term = [track2]; short_term = [track3]; recent = [track4]
-        mock_sp_instance = MagicMock() 
+        mock_sp_instance = Mock(spec=spotipy.Spotify)
         result = find_old_favorites(mock_sp_instance, long_term, medium_term, short_term, recent); self.assertCountEqual(result, [track1, track5, track6])
 
+# --- Test Classes for Playlist Fetching, Caching and Other Helpers ---
+class TestFetchAllPlaylistItems(unittest.TestCase):
+    def test_remaining_pages_fetched_by_offset_in_order(self):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        pages = {
+            0: {'items': [{'track': {'id': 't0'}}], 'next': 'url', 'total': 250},
+            100: {'items': [{'track': {'id': 't100'}}], 'next': 'url', 'total': 250},
+            200: {'items': [{'track': {'id': 't200'}}], 'next': None, 'total': 250},
+        }
+        mock_sp.playlist_items.side_effect = lambda pid, fields=None, limit=100, offset=0, additional_types=None: pages[offset]
+        items = fetch_all_playlist_items(mock_sp, 'pl1', fields='items,next,total')
+        self.assertEqual([i['track']['id'] for i in items], ['t0', 't100', 't200'])
+        self.assertEqual(mock_sp.playlist_items.call_count, 3)
+        mock_sp.next.assert_not_called()
+
+class TestCopyPlaylist(unittest.TestCase):
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_tracks_copied_in_source_order(self, mock_stdout):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        mock_sp.current_user.return_value = {'id': 'user1'}
+        mock_sp.user_playlist_create.return_value = {'id': 'new_pl'}
+        def playlist_items(pid, fields=None, limit=100, offset=0, additional_types=None):
+            return {'items': [{'track': {'uri': f'spotify:track:{i}'}} for i in range(offset, min(offset + limit, 250))],
+                    'next': None, 'total': 250}
+        mock_sp.playlist_items.side_effect = playlist_items
+        copy_playlist(mock_sp, '37i9dQZF1DXcBWIGoYBM5M', 'Copy')
+        batches = [c.args[1] for c in mock_sp.playlist_add_items.call_args_list]
+        self.assertEqual([len(b) for b in batches], [100, 100, 50])
+        self.assertEqual([uri for b in batches for uri in b], [f'spotify:track:{i}' for i in range(250)])
+        self.assertIn("250/250 tracks copied", mock_stdout.getvalue())
+
+class TestAudioFeaturesCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch('spotify_tool.AUDIO_FEATURES_CACHE_FILE', os.path.join(self.tmp_dir.name, 'features.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_second_run_is_served_from_cache(self, mock_stderr):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        mock_sp.playlist_items.return_value = {'items': [{'track': {'id': 't1', 'name': 'One', 'artists': [{'name': 'A'}]}}], 'next': None, 'total': 1}
+        mock_sp.audio_features.return_value = [{'id': 't1', 'tempo': 128.0, 'key': 5, 'mode': 1}]
+
+        first = get_audio_features_for_playlist(mock_sp, '37i9dQZF1DXcBWIGoYBM5M')
+        second = get_audio_features_for_playlist(mock_sp, '37i9dQZF1DXcBWIGoYBM5M')
+
+        self.assertEqual(first, second)
+        self.assertEqual(second[0]['tempo'], 128.0)
+        mock_sp.audio_features.assert_called_once_with(tracks=['t1'])
+
+        get_audio_features_for_playlist(mock_sp, '37i9dQZF1DXcBWIGoYBM5M', refresh_cache=True)
+        self.assertEqual(mock_sp.audio_features.call_count, 2)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_features_fetched_100_ids_per_request(self, mock_stderr):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        items = [{'track': {'id': f't{i}', 'name': f'Track {i}', 'artists': [{'name': 'A'}]}} for i in range(150)]
+        mock_sp.playlist_items.side_effect = lambda *args, offset=0, **kwargs: {'items': items[offset:offset + 100], 'next': None, 'total': 150}
+        mock_sp.audio_features.side_effect = lambda tracks: [{'id': tid, 'tempo': 120.0, 'key': 0, 'mode': 1} for tid in tracks]
+
+        result = get_audio_features_for_playlist(mock_sp, '37i9dQZF1DXcBWIGoYBM5M', use_cache=False)
+
+        self.assertEqual(len(result), 150)
+        self.assertEqual([track['id'] for track in result], [f't{i}' for i in range(150)]) # Playlist order kept
+        self.assertEqual(sorted(len(c.kwargs['tracks']) for c in mock_sp.audio_features.call_args_list), [50, 100]) # Batches run concurrently
+
+class TestSaveConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.config_file = os.path.join(self.tmp_dir.name, 'config.json')
+        patcher = patch('spotify_tool.CONFIG_FILE', self.config_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_existing_file_mode_is_kept(self, mock_stdout):
+        with open(self.config_file, 'w') as f:
+            f.write('{}')
+        os.chmod(self.config_file, 0o600)
+        save_config({'client_secret': 's'})
+        self.assertEqual(os.stat(self.config_file).st_mode & 0o777, 0o600)
+        with open(self.config_file) as f:
+            self.assertIn('client_secret', f.read())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_failed_write_leaves_no_temp_file(self, mock_stdout):
+        with patch('spotify_tool.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                save_config({'client_secret': 's'})
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+class TestGetUserPlaylists(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.names_file = os.path.join(self.tmp_dir.name, 'names.json')
+        patcher = patch('spotify_tool.PLAYLIST_NAMES_CACHE_FILE', self.names_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_fetched_by_offset_and_filtered_to_own(self):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        mock_sp.current_user.return_value = {'id': 'me'}
+        def page(limit=50, offset=0):
+            owner = 'someone_else' if offset == 50 else 'me'
+            return {'items': [{'name': f'PL {offset}', 'id': f'id{offset}', 'owner': {'id': owner}}], 'next': None, 'total': 120}
+        mock_sp.current_user_playlists.side_effect = page
+
+        self.assertEqual(get_user_playlists(mock_sp), {'PL 0': 'id0', 'PL 100': 'id100'})
+        mock_sp.current_user.assert_called_once()
+        self.assertEqual(mock_sp.current_user_playlists.call_count, 3)
+
+    def test_slow_fetch_does_not_block_other_clients(self):
+        release = threading.Event()
+        def client(blocking):
+            mock_sp = Mock(spec=spotipy.Spotify)
+            mock_sp.current_user.return_value = {'id': 'me'}
+            def page(limit=50, offset=0):
+                if blocking:
+                    release.wait(5)
+                return {'items': [{'name': 'PL', 'id': 'id1', 'owner': {'id': 'me'}}], 'next': None, 'total': 1}
+            mock_sp.current_user_playlists.side_effect = page
+            return mock_sp
+        fast_sp, slow_sp = client(False), client(True)
+        get_user_playlists(fast_sp) # Cached before the slow fetch starts
+        slow_fetch = threading.Thread(target=get_user_playlists, args=(slow_sp,))
+        slow_fetch.start()
+        try:
+            self.assertEqual(get_user_playlists(fast_sp), {'PL': 'id1'}) # Cache hit while slow_sp is mid-fetch
+            self.assertEqual(get_user_playlists(client(False)), {'PL': 'id1'}) # And a fresh fetch for another client
+            self.assertTrue(slow_fetch.is_alive())
+        finally:
+            release.set()
+            slow_fetch.join()
+
+    def test_listing_replaces_the_name_cache(self):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        mock_sp.current_user.return_value = {'id': 'me'}
+        listing = [{'name': 'Old Name', 'id': 'id1', 'owner': {'id': 'me'}}, {'name': 'Gone', 'id': 'id2', 'owner': {'id': 'me'}}]
+        mock_sp.current_user_playlists.side_effect = lambda limit=50, offset=0: {'items': list(listing), 'next': None, 'total': len(listing)}
+        get_user_playlists(mock_sp)
+        self.assertEqual(_lookup_cached_playlist_name({}, 'id1'), 'Old Name')
+
+        listing[:] = [{'name': 'New Name', 'id': 'id1', 'owner': {'id': 'me'}}] # Renamed one, deleted the other
+        get_user_playlists(mock_sp, refresh=True)
+        self.assertEqual(_lookup_cached_playlist_name({}, 'id1'), 'New Name')
+        self.assertIsNone(_lookup_cached_playlist_name({}, 'id2'))
+
+class TestWithBackoff(unittest.TestCase):
+    @patch('spotify_tool.time.sleep')
+    def test_retries_after_rate_limit(self, mock_sleep):
+        rate_limited = spotipy.SpotifyException(429, -1, "rate limited", headers={'Retry-After': '2'})
+        fn = Mock(side_effect=[rate_limited, 'ok'])
+        self.assertEqual(with_backoff(fn)('arg'), 'ok')
+        self.assertEqual(fn.call_count, 2)
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 2)
+
+    @patch('spotify_tool.time.sleep')
+    def test_long_ban_and_client_errors_are_raised(self, mock_sleep):
+        banned = spotipy.SpotifyException(429, -1, "banned", headers={'Retry-After': '3600'})
+        not_found = spotipy.SpotifyException(404, -1, "not found")
+        for error in (banned, not_found):
+            with self.assertRaises(spotipy.SpotifyException):
+                with_backoff(Mock(side_effect=error))()
+        mock_sleep.assert_not_called()
+
+class TestResolveShortLinks(unittest.TestCase):
+    @patch('spotify_tool._link_session')
+    def test_only_short_links_are_followed(self, mock_link_session):
+        mock_head = mock_link_session.return_value.head
+        mock_head.return_value.url = 'https://open.spotify.com/track/abc123?si=x'
+        urls = ['https://open.spotify.com/track/full1', 'https://spotify.link/XyZ']
+        self.assertEqual(resolve_short_links(urls),
+                         ['https://open.spotify.com/track/full1', 'https://open.spotify.com/track/abc123?si=x'])
+        mock_head.assert_called_once_with('https://spotify.link/XyZ', allow_redirects=True, timeout=10)
+
+class TestLazyImport(unittest.TestCase):
+    def test_missing_package_raises_import_error(self):
+        with self.assertRaises(ImportError): # The TUI's optional-dependency fallback relies on this
+            _lazy_import('spotify_tool_no_such_package')
+        self.assertNotIn('spotify_tool_no_such_package', sys.modules)
+
+class TestQrVersionForPayload(unittest.TestCase):
+    def test_playlist_urls_get_smallest_fitting_version(self):
+        self.assertEqual(qr_version_for_payload("spotify:playlist:" + "a" * 22), 3) # 39 bytes
+        self.assertEqual(qr_version_for_payload("https://open.spotify.com/playlist/" + "a" * 22), 4) # 56 bytes
+        self.assertEqual(qr_version_for_payload("x" * 17), 1)
+        self.assertEqual(qr_version_for_payload("x" * 18), 2)
+
+    def test_oversized_payload_returns_none(self):
+        self.assertIsNone(qr_version_for_payload("x" * 272))
+
+class TestGeneratePlaylistQrCodes(unittest.TestCase):
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_two_playlists_rendered_to_files_in_order(self, mock_stdout):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            items = [('https://open.spotify.com/playlist/' + 'a' * 22, os.path.join(tmp_dir, 'one.png')),
+                     ('spotify:playlist:' + 'b' * 22, os.path.join(tmp_dir, 'two.png'))] # Neither needs a name lookup
+            result = generate_playlist_qr_codes(Mock(spec=spotipy.Spotify), items, max_workers=2)
+            self.assertEqual(result, [filename for _, filename in items])
+            for filename in result:
+                with open(filename, 'rb') as f:
+                    self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+
+class TestMainAddSongCommand(unittest.TestCase):
+    @patch('spotify_tool.add_to_playlists', return_value=[('Mix', True, None)])
+    @patch('spotify_tool.get_user_playlists', return_value={'Mix': 'pl1'})
+    @patch('spotify_tool.setup_spotify_client')
+    @patch('spotify_tool.get_genre_config', return_value={'playlists': ['Mix'], 'save_to_liked': False})
+    @patch('spotify_tool.load_config')
+    @patch('spotify_tool.parse_arguments')
+    @patch('builtins.print')
+    def test_playlists_listed_once_for_all_songs(self, mock_print, mock_parse, mock_load_config, mock_genre_config, mock_setup_sp, mock_get_playlists, mock_add):
+        urls = [f'https://open.spotify.com/track/t{i}' for i in range(3)]
+        mock_parse.return_value = {'command': 'add_song', 'urls': urls, 'genre': None}
+        main()
+        mock_get_playlists.assert_called_once_with(mock_setup_sp.return_value)
+        mock_add.assert_called_once_with(mock_setup_sp.return_value, ['t0', 't1', 't2'], [('Mix', 'pl1')], False, config=mock_load_config.return_value)
+
 # --- New/Updated Test Classes for Playlist Locking ---
 class TestPlaylistLockingFunctionality(unittest.TestCase):
     def test_is_playlist_locked(self):
@@ -152,6 +416,21 @@ class TestPlaylistLockingFunctionality(unittest.TestCase):
         if 'locked_playlists' not in config_no_key: config_no_key['locked_playlists'] = []
         self.assertFalse(is_playlist_locked(config_no_key, 'id1'))
 
+    def test_locked_playlist_ids_snapshot(self):
+        config = {'locked_playlists': [{'id': 'id1', 'name': 'One'}, {'id': 'id2', 'name': 'Two'}]}
+        self.assertEqual(locked_playlist_ids(config), frozenset({'id1', 'id2'}))
+        self.assertEqual(locked_playlist_ids({'locked_playlists': 'bad'}), frozenset())
+
+    def test_locked_playlists_index(self):
+        locked = LockedPlaylists([{'id': 'id1', 'name': 'N1'}, 'not-a-dict'])
+        self.assertTrue(locked.contains('id1'))
+        self.assertTrue(locked.add('id2', 'N2'))
+        self.assertFalse(locked.add('id1', 'N1'))
+        self.assertEqual(locked.remove_id('id1'), {'id': 'id1', 'name': 'N1'})
+        self.assertIsNone(locked.remove_id('id1'))
+        self.assertFalse(locked.contains('id1'))
+        self.assertEqual(locked, ['not-a-dict', {'id': 'id2', 'name': 'N2'}]) # Still a plain list to JSON
+
     @patch('builtins.print') # Mock print for this specific test
     def test_lock_playlist(self, mock_print):
         config = {'locked_playlists': []}
@@ -188,17 +467,10 @@ class TestPlaylistLockingFunctionality(unittest.TestCase):
         self.assertFalse(unlock_playlist(config_empty, 'id1'))
         mock_print.assert_called_with("ℹ️ Playlist ID 'id1' not found in locked list or already unlocked.")
 
-    @patch('spotify_tool.is_playlist_locked', return_value=False) # Assume not locked by default
-    @patch('spotify_tool.spotipy.Spotify')
-    def test_add_to_playlists_respects_lock(self, mock_sp_constructor, mock_is_locked):
+    @patch('spotify_tool.spotipy.Spotify', spec=True)
+    def test_add_to_playlists_respects_lock(self, mock_sp_constructor):
         mock_sp = mock_sp_constructor.return_value
-        config = {'locked_playlists': [{'id': 'locked_id', 'name': 'Locked Playlist'}]}
-        
-        # Setup mock_is_locked to simulate 'locked_id' being locked
-        def side_effect_is_locked(cfg, pid):
-            if pid == 'locked_id': return True
-            return False
-        mock_is_locked.side_effect = side_effect_is_locked
+        config = {'locked_playlists': [{'id': 'locked_id', 'name': 'Locked Playlist'}]} # Only 'locked_id' is locked
 
         playlist_ids_to_try = [('Locked Playlist', 'locked_id'), ('Unlocked Playlist', 'unlocked_id')]
         
@@ -220,72 +492,69 @@ class TestPlaylistLockingFunctionality(unittest.TestCase):
         mock_sp.playlist_add_items.assert_any_call('locked_id', ['spotify:track:track123'])
         mock_sp.playlist_add_items.assert_any_call('unlocked_id', ['spotify:track:track123'])
 
+    def test_add_to_playlists_batches_requests(self):
+        mock_sp = Mock(spec=spotipy.Spotify)
+        config = {'locked_playlists': LockedPlaylists([{'id': 'locked_id', 'name': 'Locked Playlist'}])}
+        track_ids = [f"t{i}" for i in range(150)]
+        playlist_ids = [('Locked Playlist', 'locked_id'), ('Open Playlist', 'open_id')]
 
-class TestParseArguments(unittest.TestCase):
-    # ... (keep existing tests for curate, suggest, old-favorites, etc.) ...
-    @patch('sys.exit') 
-    @patch('builtins.print') 
-    def test_parse_curate_playlist_command(self, mock_print, mock_exit):
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--curate-playlist', 'source_playlist_url']): args = parse_arguments(); self.assertEqual(args['command'], 'curate_playlist'); # ... rest of assertions
-        mock_exit.reset_mock()
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--curate-playlist']): parse_arguments(); mock_exit.assert_called_once_with(1) 
-    
-    @patch('sys.exit')
-    @patch('builtins.print')
-    def test_parse_suggest_genres_command(self, mock_print, mock_exit):
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--suggest-genres']): args = parse_arguments(); self.assertEqual(args, {'command': 'suggest_genres', 'time_range': 'medium_term'}); mock_exit.assert_not_called()
-        mock_exit.reset_mock()
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--suggest-genres', '--time-range', 'invalid_range']): parse_arguments() ; mock_exit.assert_called_once_with(1) 
+        results = add_to_playlists(mock_sp, track_ids, playlist_ids, save_to_liked=True, config=config)
+
+        self.assertEqual(results, [("Liked Songs", True, None),
+                                   ('Locked Playlist', False, "Playlist is locked"),
+                                   ('Open Playlist', True, None)])
+        self.assertEqual(mock_sp.current_user_saved_tracks_add.call_count, 3) # 50 per call
+        self.assertEqual(mock_sp.playlist_add_items.call_count, 2) # 100 per call, locked skipped
+        first_batch = mock_sp.playlist_add_items.call_args_list[0][0]
+        self.assertEqual(first_batch[0], 'open_id')
+        self.assertEqual(len(first_batch[1]), 100)
 
-    @patch('sys.exit')
-    @patch('builtins.print')
-    def test_parse_old_favorites_command(self, mock_print, mock_exit):
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--old-favorites']): args = parse_arguments(); self.assertEqual(args, {'command': 'old_favorites', 'suggestions': 20}); mock_exit.assert_not_called()
-        mock_exit.reset_mock()
-        with patch.object(sys, 'argv', ['spotify_tool.py', '--old-favorites', '--suggestions', 'abc']): parse_arguments(); mock_exit.assert_called_once_with(1)
 
-    @patch('sys.exit')
+class TestParseArguments(unittest.TestCase):
+    # (argv after the script name, expected parse) and argv lists that must exit with status 1;
+    # each case runs as a subTest, so a failure still names the argv that caused it
+    VALID_CASES = [
+        (['--curate-playlist', 'source_playlist_url'], {'command': 'curate_playlist', 'source_playlist_id_or_url': 'source_playlist_url', 'new_name': None}),
+        (['--suggest-genres'], {'command': 'suggest_genres', 'time_range': 'medium_term'}),
+        (['--old-favorites'], {'command': 'old_favorites', 'suggestions': 20}),
+        (['lock', 'playlist_id_123'], {'command': 'lock_playlist', 'playlist_input': 'playlist_id_123'}),
+        (['unlock', 'playlist_id_456'], {'command': 'unlock_playlist', 'playlist_input': 'playlist_id_456'}),
+        (['list-locked'], {'command': 'list_locked_playlists'}),
+    ]
+    INVALID_CASES = [
+        ['--curate-playlist'],
+        ['--suggest-genres', '--time-range', 'invalid_range'],
+        ['--old-favorites', '--suggestions', 'abc'],
+        ['lock'], # Missing arg
+        ['unlock'], # Missing arg
+    ]
+
+    def test_valid_arguments(self):
+        for args, expected in self.VALID_CASES:
+            with self.subTest(args=args), patch.object(sys, 'argv', ['spotify_tool.py', *args]):
+                self.assertEqual(parse_arguments(), expected)
+
     @patch('builtins.print')
-    def test_parse_lock_unlock_list_commands(self, mock_print, mock_exit):
-        # Lock command
-        with patch.object(sys, 'argv', ['spotify_tool.py', 'lock', 'playlist_id_123']):
-            args = parse_arguments()
-            self.assertEqual(args, {'command': 'lock_playlist', 'playlist_input': 'playlist_id_123'})
-            mock_exit.assert_not_called()
-        mock_exit.reset_mock()
-        with patch.object(sys, 'argv', ['spotify_tool.py', 'lock']): # Missing arg
-            parse_arguments()
-            mock_exit.assert_called_once_with(1)
-        mock_exit.reset_mock()
-
-        # Unlock command
-        with patch.object(sys, 'argv', ['spotify_tool.py', 'unlock', 'playlist_id_456']):
-            args = parse_arguments()
-            self.assertEqual(args, {'command': 'unlock_playlist', 'playlist_input': 'playlist_id_456'})
-            mock_exit.assert_not_called()
-        mock_exit.reset_mock()
-        with patch.object(sys, 'argv', ['spotify_tool.py', 'unlock']): # Missing arg
-            parse_arguments()
-            mock_exit.assert_called_once_with(1)
-        mock_exit.reset_mock()
-
-        # List-locked command
-        with patch.object(sys, 'argv', ['spotify_tool.py', 'list-locked']):
-            args = parse_arguments()
-            self.assertEqual(args, {'command': 'list_locked_playlists'})
-            mock_exit.assert_not_called()
+    def test_invalid_arguments_exit_with_status_1(self, mock_print):
+        for args in self.INVALID_CASES:
+            # The real sys.exit, so parsing stops where the CLI would
+            with self.subTest(args=args), patch.object(sys, 'argv', ['spotify_tool.py', *args]):
+                with self.assertRaises(SystemExit) as cm:
+                    parse_arguments()
+                self.assertEqual(cm.exception.code, 1)
 
 class TestMainLockUnlockListCommands(unittest.TestCase):
     @patch('spotify_tool.save_config')
     @patch('spotify_tool.lock_playlist')
-    @patch('spotify_tool.spotipy.Spotify') # To mock sp.playlist()
+    @patch('spotify_tool.spotipy.Spotify', spec=True) # To mock sp.playlist()
     @patch('spotify_tool.extract_playlist_id')
     @patch('spotify_tool.setup_spotify_client')
     @patch('spotify_tool.load_config')
+    @patch('spotify_tool._read_playlist_names', return_value={}) # Name not cached, so it's fetched
     @patch('builtins.print') # Capture print output from main
-    def test_main_lock_playlist_success(self, mock_print_main, mock_load_config, mock_setup_sp, mock_extract_id, mock_sp_class, mock_lock_playlist, mock_save_config):
+    def test_main_lock_playlist_success(self, mock_print_main, mock_read_names, mock_load_config, mock_setup_sp, mock_extract_id, mock_sp_class, mock_lock_playlist, mock_save_config):
         mock_load_config.return_value = {"locked_playlists": []} # Sample config
-        mock_sp_instance = MagicMock()
+        mock_sp_instance = mock_sp_class.return_value # Specced from the real client by the patch above
         mock_setup_sp.return_value = mock_sp_instance
         mock_extract_id.return_value = "valid_playlist_id"
         mock_sp_instance.playlist.return_value = {'name': 'Test Playlist Name'} # Mock sp.playlist() call
@@ -299,6 +568,25 @@ class TestMainLockUnlockListCommands(unittest.TestCase):
         mock_lock_playlist.assert_called_once_with(mock_load_config.return_value, 'valid_playlist_id', 'Test Playlist Name')
         mock_save_config.assert_called_once_with(mock_load_config.return_value)
 
+    @patch('spotify_tool.save_config')
+    @patch('spotify_tool.lock_playlist')
+    @patch('spotify_tool.extract_playlist_id')
+    @patch('spotify_tool.setup_spotify_client')
+    @patch('spotify_tool.load_config')
+    @patch('spotify_tool._read_playlist_names', return_value={'valid_playlist_id': 'Cached Name'})
+    @patch('builtins.print')
+    def test_main_lock_playlist_uses_cached_name(self, mock_print_main, mock_read_names, mock_load_config, mock_setup_sp, mock_extract_id, mock_lock_playlist, mock_save_config):
+        mock_load_config.return_value = {"locked_playlists": []} # Not locked yet, so the lock really happens
+        mock_extract_id.return_value = "valid_playlist_id"
+        mock_lock_playlist.return_value = True
+
+        with patch.object(sys, 'argv', ['spotify_tool.py', 'lock', 'some_playlist_url']):
+            main()
+
+        mock_setup_sp.assert_not_called() # No Spotify round-trip when the name is already known
+        mock_lock_playlist.assert_called_once_with(mock_load_config.return_value, 'valid_playlist_id', 'Cached Name')
+        mock_save_config.assert_called_once_with(mock_load_config.return_value)
+
     @patch('spotify_tool.save_config')
     @patch('spotify_tool.unlock_playlist')
     @patch('spotify_tool.extract_playlist_id')